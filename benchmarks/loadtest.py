@@ -0,0 +1,366 @@
+"""
+Offline load test for the FastAPI services.
+
+Replays a weighted request mix (JSONL, see benchmarks/mixes/) against one
+service, either in-process over ASGI or over HTTP against real uvicorn
+workers, and reports count, errors, RPS and p50/p95/p99 latency per route.
+By default the service runs against a throwaway SQLite database, so no
+Postgres or docker-compose stack is needed.
+
+    python benchmarks/loadtest.py --service products --mode asgi
+    python benchmarks/loadtest.py --service users --mode uvicorn --workers 2 --save
+    python benchmarks/loadtest.py --service products --compare benchmarks/results/products-asgi.json
+
+Mix file lines:
+    {"name": "get_product", "method": "GET", "path": "/api/products/{id}", "id_range": [1, 500], "weight": 40}
+    {"phase": "setup", "method": "POST", "path": "/api/products/", "json": {...}, "repeat": 500}
+Strings may use {n} (setup repeat index), {id} (random int in id_range),
+{uid} (unique per request) and any value captured by a setup line's
+"capture": {"var": "response_field"}. "expect" lists acceptable statuses
+(default: anything below 400).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Shared by warmup and measured runs so {uid} never repeats within a process
+_uids = itertools.count()
+
+
+# =============================
+# MIX FILE
+# =============================
+
+def load_mix(path: Path):
+    setup, mix = [], []
+    with open(path) as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("//"):
+                continue
+            entry = json.loads(line)
+            entry.setdefault("name", f"{entry['method']} {entry['path']}")
+            entry.setdefault("weight", 1)
+            (setup if entry.get("phase") == "setup" else mix).append(entry)
+    if not mix:
+        raise SystemExit(f"{path}: no measured requests in mix")
+    return setup, mix
+
+
+def render(value, variables: dict):
+    if isinstance(value, str):
+        return value.format_map(variables)
+    if isinstance(value, dict):
+        return {k: render(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, variables) for v in value]
+    return value
+
+
+def build_request(entry: dict, variables: dict):
+    if "id_range" in entry:
+        variables = {**variables, "id": random.randint(*entry["id_range"])}
+    return (
+        entry["method"],
+        render(entry["path"], variables),
+        render(entry.get("json"), variables),
+        render(entry.get("headers", {}), variables),
+    )
+
+
+def is_ok(entry: dict, status_code: int) -> bool:
+    expect = entry.get("expect")
+    return status_code in expect if expect else status_code < 400
+
+
+# =============================
+# TARGETS
+# =============================
+
+def service_env(service_dir: Path, database_url: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env["PYTHONPATH"] = str(service_dir)
+    return env
+
+
+class AsgiTarget:
+    """Imports the service's app in this process and drives it over ASGI."""
+
+    def __init__(self, service_dir: Path, database_url: str):
+        os.environ["DATABASE_URL"] = database_url
+        sys.path.insert(0, str(service_dir))
+        from app.main import app
+        self.app = app
+        self._lifespan = None
+
+    async def __aenter__(self):
+        from app.db.migrate import migrate
+        await migrate()
+        self._lifespan = self.app.router.lifespan_context(self.app)
+        await self._lifespan.__aenter__()
+        transport = httpx.ASGITransport(app=self.app)
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+    async def __aexit__(self, *exc):
+        await self._lifespan.__aexit__(*exc)
+
+
+class UvicornTarget:
+    """Runs the service under real uvicorn workers and drives it over TCP."""
+
+    def __init__(self, service_dir: Path, database_url: str, workers: int, concurrency: int):
+        self.service_dir = service_dir
+        self.database_url = database_url
+        self.workers = workers
+        self.concurrency = concurrency
+        self.process = None
+
+    async def __aenter__(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        subprocess.run(
+            [sys.executable, "-m", "app.db.migrate"],
+            cwd=self.service_dir, env=service_env(self.service_dir, self.database_url), check=True,
+        )
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=self.service_dir,
+            env=service_env(self.service_dir, self.database_url),
+        )
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30)
+        deadline = time.monotonic() + 30
+        while True:
+            if self.process.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            try:
+                if (await client.get("/")).status_code == 200:
+                    return client
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise SystemExit("uvicorn did not become ready within 30s")
+            await asyncio.sleep(0.2)
+
+    async def __aexit__(self, *exc):
+        self.process.send_signal(signal.SIGINT)
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+# =============================
+# RUN
+# =============================
+
+async def run_setup(client: httpx.AsyncClient, setup: list) -> dict:
+    variables = {}
+    for entry in setup:
+        for n in range(entry.get("repeat", 1)):
+            method, path, body, headers = build_request(entry, {**variables, "n": n, "uid": n})
+            response = await client.request(method, path, json=body, headers=headers)
+            if not is_ok(entry, response.status_code):
+                raise SystemExit(f"setup {entry['name']} failed: {response.status_code} {response.text[:200]}")
+            for name, field in entry.get("capture", {}).items():
+                variables[name] = response.json()[field]
+    return variables
+
+
+async def run_mix(client, mix, variables, concurrency: int, requests: int, duration: float):
+    names = [entry["name"] for entry in mix]
+    weights = [entry["weight"] for entry in mix]
+    by_name = {entry["name"]: entry for entry in mix}
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    issued = itertools.count()
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if deadline is None and next(issued) >= requests:
+                return
+            entry = by_name[random.choices(names, weights)[0]]
+            method, path, body, headers = build_request(entry, {**variables, "uid": f"{os.getpid()}-{next(_uids)}"})
+            start = time.perf_counter_ns()
+            try:
+                response = await client.request(method, path, json=body, headers=headers)
+                ok = is_ok(entry, response.status_code)
+            except httpx.HTTPError:
+                ok = False
+            latencies[entry["name"]].append((time.perf_counter_ns() - start) / 1e6)
+            if not ok:
+                errors[entry["name"]] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return summarize(latencies, errors, elapsed)
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: dict, errors: dict, elapsed: float) -> dict:
+    routes = {}
+    everything = []
+    for name, values in latencies.items():
+        values.sort()
+        everything.extend(values)
+        routes[name] = {
+            "count": len(values),
+            "errors": errors[name],
+            "rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 50),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+        }
+    everything.sort()
+    routes["TOTAL"] = {
+        "count": len(everything),
+        "errors": sum(errors.values()),
+        "rps": len(everything) / elapsed,
+        "p50_ms": percentile(everything, 50),
+        "p95_ms": percentile(everything, 95),
+        "p99_ms": percentile(everything, 99),
+    }
+    return {"elapsed_s": elapsed, "routes": routes}
+
+
+# =============================
+# REPORTING
+# =============================
+
+def print_report(summary: dict, baseline: dict = None):
+    header = f"{'route':<34}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δrps':>9}{'Δp95':>9}"
+    print(header)
+    for name, row in summary["routes"].items():
+        line = (f"{name:<34}{row['count']:>8}{row['errors']:>8}{row['rps']:>10.1f}"
+                f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}")
+        base = (baseline or {}).get("routes", {}).get(name)
+        if base:
+            line += f"{pct_change(base['rps'], row['rps']):>9}{pct_change(base['p95_ms'], row['p95_ms']):>9}"
+        print(line)
+
+
+def pct_change(before: float, after: float) -> str:
+    return f"{(after - before) / before * 100:+.0f}%" if before else "n/a"
+
+
+def regressions(summary: dict, baseline: dict, threshold_pct: float):
+    found = []
+    for name, row in summary["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and (row["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 > threshold_pct:
+            found.append(f"{name}: p95 {base['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms")
+        if base["rps"] and (base["rps"] - row["rps"]) / base["rps"] * 100 > threshold_pct:
+            found.append(f"{name}: rps {base['rps']:.1f} -> {row['rps']:.1f}")
+    return found
+
+
+async def main(args):
+    service_dir = ROOT / "services" / args.service
+    mix_path = Path(args.mix) if args.mix else Path(__file__).resolve().parent / "mixes" / f"{args.service}.jsonl"
+    setup, mix = load_mix(mix_path)
+    random.seed(args.seed)
+
+    tmpdir = None
+    database_url = args.database_url
+    if not database_url:
+        tmpdir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite+aiosqlite:///{tmpdir.name}/loadtest.db"
+
+    if args.mode == "asgi":
+        target = AsgiTarget(service_dir, database_url)
+    else:
+        target = UvicornTarget(service_dir, database_url, args.workers, args.concurrency)
+
+    try:
+        async with target as client:
+            variables = await run_setup(client, setup)
+            if args.warmup:
+                await run_mix(client, mix, variables, args.concurrency, args.warmup, 0)
+            summary = await run_mix(client, mix, variables, args.concurrency, args.requests, args.duration)
+            await client.aclose()
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    summary["meta"] = {
+        "service": args.service, "mode": args.mode, "workers": args.workers if args.mode == "uvicorn" else 1,
+        "concurrency": args.concurrency, "mix": str(mix_path), "database": "sqlite" if tmpdir else "custom",
+        "python": platform.python_version(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(summary, baseline)
+
+    if args.save:
+        path = Path(args.save) if isinstance(args.save, str) else RESULTS_DIR / f"{args.service}-{args.mode}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nSaved results to {path}")
+
+    if baseline:
+        found = regressions(summary, baseline, args.threshold)
+        if found:
+            print(f"\nRegressions over {args.threshold:.0f}%:")
+            for line in found:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=["products", "users"], required=True)
+    parser.add_argument("--mode", choices=["asgi", "uvicorn"], default="asgi")
+    parser.add_argument("--mix", help="JSONL request mix (default: benchmarks/mixes/<service>.jsonl)")
+    parser.add_argument("--database-url", help="Run against this database instead of a temporary SQLite file")
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn workers (uvicorn mode)")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, default=0, help="Measure for this many seconds instead")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", nargs="?", const=True, help="Write results JSON (default: benchmarks/results/<service>-<mode>.json)")
+    parser.add_argument("--compare", help="Baseline results JSON to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
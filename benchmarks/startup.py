@@ -0,0 +1,114 @@
+"""
+Cold-start benchmark for the FastAPI services: how long a fresh worker
+process takes to import the app and run its lifespan startup, i.e. how soon
+a scaled-out pod can serve.
+
+Each run is a new interpreter (no warm module cache in memory; .pyc files
+are used as in production). One extra run under `python -X importtime`
+breaks the import cost down by top-level package.
+
+    python benchmarks/startup.py --service products
+    python benchmarks/startup.py --service users --runs 10 --top 20
+    python benchmarks/startup.py --service products --max-import-ms 800   # CI gate
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Runs inside the service's interpreter; prints its own timings as JSON
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({"import_ms": (imported - start) * 1000, "lifespan_ms": (ready - imported) * 1000}))
+"""
+
+
+def service_env(service_dir: Path, database_url: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env["PYTHONPATH"] = str(service_dir)
+    return env
+
+
+def probe(service_dir: Path, env: dict, importtime: bool = False):
+    args = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    start = time.perf_counter()
+    result = subprocess.run(args, cwd=service_dir, env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"Probe failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = wall_ms
+    return timings, result.stderr
+
+
+def by_package(importtime_log: str) -> dict:
+    """Self import time (ms) per top-level package from -X importtime output."""
+    totals = defaultdict(float)
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us) / 1000
+    return totals
+
+
+def main(args):
+    service_dir = ROOT / "services" / args.service
+    with tempfile.TemporaryDirectory() as tmpdir:
+        env = service_env(service_dir, args.database_url or f"sqlite+aiosqlite:///{tmpdir}/startup.db")
+
+        # Warm the .pyc cache once so runs measure a deployed image, not compilation
+        probe(service_dir, env)
+        runs = [probe(service_dir, env)[0] for _ in range(args.runs)]
+        _, log = probe(service_dir, env, importtime=True)
+
+    print(f"{args.service}: {args.runs} cold starts ({sys.executable})\n")
+    print(f"{'phase':<22}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for key, label in (("import_ms", "import app.main"), ("lifespan_ms", "lifespan startup"),
+                       ("process_ms", "process total")):
+        values = [run[key] for run in runs]
+        print(f"{label:<22}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+    packages = sorted(by_package(log).items(), key=lambda item: -item[1])
+    total = sum(ms for _, ms in packages)
+    print(f"\nImport time by top-level package (-X importtime, self time, {total:.0f} ms total)")
+    for name, ms in packages[:args.top]:
+        print(f"  {name:<30}{ms:>8.1f} ms  {ms / total * 100:>5.1f}%")
+
+    median_import = statistics.median(run["import_ms"] for run in runs)
+    if args.max_import_ms and median_import > args.max_import_ms:
+        print(f"\nImport took {median_import:.0f} ms, over the {args.max_import_ms:.0f} ms budget")
+        return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--service", choices=["products", "users"], required=True)
+    parser.add_argument("--database-url", help="Run against this database instead of a temporary SQLite file")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Packages shown in the import breakdown")
+    parser.add_argument("--max-import-ms", type=float, default=0, help="Exit 1 if the median import is slower")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -1,33 +1,117 @@
-from datetime import datetime, timedelta
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional, Tuple
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
 from app.core.config import settings
 
 def create_access_token(subject: str, expires_delta: int = None):
-    expire = datetime.now() + timedelta(minutes=(expires_delta or settings.ACCESS_TOKEN_EXPIRE_MINUTES))
+    expire = datetime.now(timezone.utc) + timedelta(minutes=(expires_delta or settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     payload = {"sub": str(subject), "exp": expire}
     token = jwt.encode(payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return token
 
+
+# =============================
+# TOKEN DECODING
+# =============================
+
+def _load_decoder(backend: str) -> Callable[[str], dict]:
+    # PyJWT verifies noticeably faster than python-jose; both check exp
+    if backend == "pyjwt":
+        import jwt as pyjwt
+
+        def decode(token: str) -> dict:
+            return pyjwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        return decode
+
+    def decode(token: str) -> dict:
+        return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+    return decode
+
+
+class TokenCache:
+    """Bounded LRU of verified claims, keyed by token digest, valid until exp."""
+
+    def __init__(self, max_entries: int, max_ttl: int):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+
+    def get(self, digest: bytes) -> Optional[dict]:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[digest]
+            return None
+        self._entries.move_to_end(digest)
+        return claims
+
+    def put(self, digest: bytes, claims: dict):
+        expires_at = time.time() + self.max_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        self._entries[digest] = (expires_at, claims)
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+_decode = _load_decoder(settings.JWT_BACKEND)
+token_cache = TokenCache(settings.JWT_CACHE_SIZE, settings.JWT_CACHE_MAX_TTL_SECONDS)
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Verified claims, or None if the token is invalid or expired. Decodes at most once per token."""
+    digest = hashlib.sha256(token.encode("utf-8")).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        try:
+            claims = _decode(token)
+        except Exception:
+            return None
+        token_cache.put(digest, claims)
+    return dict(claims)
+
+
 def verify_token(token: str):
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        return payload.get("sub")
-    except Exception:
-        return None
-    
+    payload = decode_token(token)
+    return payload.get("sub") if payload else None
+
 def is_token_expired(token: str):
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
-        exp = payload.get("exp")
-        if exp and datetime.now(datetime.timezone.utc) > datetime.fromtimestamp(datetime.timezone.utc):
-            return True
-        return False
-    except Exception:
-        return True
-    
+    # decode_token rejects expired tokens, so any token it accepts is still valid
+    return decode_token(token) is None
+
 def refresh_access_token(token: str, expires_delta: int = None):
     subject = verify_token(token)
-    if subject is None or is_token_expired(token):
+    if subject is None:
         return None
     return create_access_token(subject, expires_delta)
 
+
+# =============================
+# AUTH DEPENDENCY
+# =============================
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+async def get_current_claims(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> dict:
+    """Claims of the request's bearer token; FastAPI resolves this once per request."""
+    claims = decode_token(credentials.credentials) if credentials else None
+    if claims is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return claims
@@ -0,0 +1,225 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+cache_requests = Counter(
+    'cache_requests',
+    'Read-through cache lookups per cache and result (hit, miss); coalescing is counted by singleflight_calls',
+    ['cache', 'result']
+)
+
+
+# =============================
+# BACKENDS
+# =============================
+
+class CacheBackend:
+    """Key/value store for JSON-serializable dicts."""
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def get_many(self, keys: List[str]) -> List[Optional[dict]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(self, key: str, value: dict) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+    async def ping(self) -> None:
+        """Raises when the backend is unreachable; local backends always answer."""
+        pass
+
+
+class NullCache(CacheBackend):
+    """Never stores anything; lookups still go through single-flight."""
+
+    async def get(self, key: str) -> Optional[dict]:
+        return None
+
+    async def set(self, key: str, value: dict) -> None:
+        pass
+
+    async def delete(self, key: str) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Per-process LRU with a fixed TTL per entry."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache(CacheBackend):
+    """Shared cache across replicas; entries expire server-side after the TTL."""
+
+    def __init__(self, host: str, port: int, db: int, ttl_seconds: int, prefix: str):
+        # Imported lazily so the redis package is only needed when enabled
+        import redis.asyncio as redis
+
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._client = redis.Redis(host=host, port=port, db=db)
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[dict]]:
+        raws = await self._client.mget([self.prefix + key for key in keys])
+        return [json.loads(raw) if raw is not None else None for raw in raws]
+
+    async def set(self, key: str, value: dict) -> None:
+        await self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self._client.delete(self.prefix + key)
+
+    async def ping(self) -> None:
+        await self._client.ping()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_cache_backend(name: str) -> CacheBackend:
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "redis":
+        return RedisCache(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            ttl_seconds=settings.CACHE_TTL_SECONDS,
+            prefix=f"{name}:",
+        )
+    if backend == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL_SECONDS)
+    return NullCache()
+
+
+# =============================
+# READ-THROUGH CACHE
+# =============================
+
+class ReadThroughCache:
+    """
+    Wraps a backend with read-through loading. Concurrent misses for the same
+    key share one loader call (see SingleFlight), and backend failures fall
+    back to the loader instead of failing the request.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend):
+        self.name = name
+        self.backend = backend
+        self._flights = SingleFlight(name)
+        # Per-key token of the load in progress; invalidation drops it
+        self._loading: Dict[str, object] = {}
+        # Bumped on every invalidation so batch loads can detect racing writes
+        self._epoch = 0
+        self._hits = cache_requests.labels(cache=name, result="hit")
+        self._misses = cache_requests.labels(cache=name, result="miss")
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        value = await self._backend_call("get", key)
+        if value is not None:
+            self._hits.inc()
+            return value
+
+        self._misses.inc()
+
+        async def load():
+            token = object()
+            self._loading[key] = token
+            try:
+                value = await loader()
+            finally:
+                current = self._loading.get(key) is token
+                if current:
+                    del self._loading[key]
+            # Only populate if no write invalidated the key while we were loading
+            if current and value is not None:
+                await self._backend_call("set", key, value)
+            return value
+
+        return await self._flights.do(key, load)
+
+    async def get_many_or_load(
+        self, keys: List[str], loader: Callable[[List[str]], Awaitable[Dict[str, dict]]]
+    ) -> Dict[str, dict]:
+        """Fetches many keys at once; all misses are loaded with a single loader call."""
+        cached = await self._backend_call("get_many", keys) or [None] * len(keys)
+        found = {key: value for key, value in zip(keys, cached) if value is not None}
+        missing = [key for key in keys if key not in found]
+        self._hits.inc(len(found))
+        if not missing:
+            return found
+
+        self._misses.inc(len(missing))
+        epoch = self._epoch
+        loaded = await loader(missing)
+        if epoch == self._epoch:
+            for key, value in loaded.items():
+                await self._backend_call("set", key, value)
+        found.update(loaded)
+        return found
+
+    async def invalidate(self, key: str) -> None:
+        self._epoch += 1
+        self._loading.pop(key, None)
+        self._flights.forget(key)
+        await self._backend_call("delete", key)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    async def _backend_call(self, method: str, *args):
+        try:
+            return await getattr(self.backend, method)(*args)
+        except Exception as e:
+            logger.warning(f"Cache '{self.name}' {method} failed: {e}")
+            return None
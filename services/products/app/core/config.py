@@ -1,20 +1,9 @@
 import os
-from pathlib import Path
+from typing import Dict
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
-from decouple import config
 
-# Base directory
-BASE_DIR = Path(__file__).resolve().parent.parent.parent
-
-# Determine which env file to load based on ENV variable
-# Default to local if ENV is not set
-env_file = BASE_DIR / ".env.local"
 env_type = os.environ.get("ENV", "local").lower()
-if env_type == "prod":
-    env_file = BASE_DIR / ".env.prod"
-
-print(f"Loading environment: {env_type} from {env_file}")
 
 class Settings(BaseSettings):
     # Environment info
@@ -35,15 +24,147 @@ class Settings(BaseSettings):
     POSTGRES_HOST: str = "localhost"
     POSTGRES_PORT: int = 5432
 
+    # Engine / connection pool settings (per worker process). Size against
+    # max replicas x workers per pod x (pool size + overflow) <= max_connections
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 disables the server-side timeout
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100
+
+    # Redis settings
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+
+    # Product read-through cache: "memory" (per-process LRU), "redis" or "none".
+    # Memory caches drop rows changed by other workers and replicas by polling the
+    # published change events every CACHE_SYNC_INTERVAL_SECONDS, so they lag
+    # writes elsewhere by about that plus the outbox relay interval
+    CACHE_BACKEND: str = "memory"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 10000
+    CACHE_SYNC_INTERVAL_SECONDS: float = 1.0
+
     JWT_SECRET: str = "secret"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # "jose" or "pyjwt" (faster, needs PyJWT installed)
+    JWT_BACKEND: str = "jose"
+    # Verified claims are cached per token until exp, capped at this TTL
+    JWT_CACHE_SIZE: int = 10000
+    JWT_CACHE_MAX_TTL_SECONDS: int = 300
+
+    # Offline geo enrichment for the unique_user_locations metric
+    # GEOIP_DB_PATH points at a range database built with `python -m app.core.geoip`
+    GEOIP_DB_PATH: str = ""
+    GEOIP_CACHE_SIZE: int = 4096
+    GEOIP_BUCKET_DEGREES: float = 10.0
+    GEOIP_QUEUE_SIZE: int = 10000
+    GEOIP_BATCH_SIZE: int = 256
+
+    # Pagination settings
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+    BATCH_IDS_MAX: int = 100
+
+    # Rows fetched per server-side cursor round trip / NDJSON chunk on export
+    EXPORT_CHUNK_SIZE: int = 1000
+
+    # Bulk upsert: rows per INSERT ... ON CONFLICT statement, errors reported back
+    BULK_BATCH_SIZE: int = 1000
+    BULK_MAX_ERRORS: int = 1000
+
+    # Stock reservation: line items accepted per reserve/release request
+    STOCK_ITEMS_MAX: int = 100
+
+    # Serialize ORM rows straight to JSON by the response schema's field names,
+    # skipping FastAPI's response_model re-validation (rows come from our own DB)
+    SKIP_RESPONSE_VALIDATION: bool = True
+
+    # Cache-Control sent with ETags on reads; no-cache still allows 304 revalidation
+    HTTP_CACHE_CONTROL_DETAIL: str = "public, max-age=5"
+    HTTP_CACHE_CONTROL_LIST: str = "public, no-cache"
+
+    # Response compression: gzip, plus br when the brotli package is installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # Product change events: written to the outbox table with each change, then
+    # published in batches by a background relay to OUTBOX_SINK
+    # ("none", "memory", "file" or "redis" for a Redis stream) and served by
+    # GET /api/products/changes. Published events are kept for the retention window.
+    # The relay and pruning jobs run where OUTBOX_RELAY_ENABLED is set; when scaled
+    # out, enable them in one process only so other workers keep their pooled
+    # connections for requests
+    OUTBOX_RELAY_ENABLED: bool = True
+    OUTBOX_SINK: str = "none"
+    OUTBOX_FILE_PATH: str = "product-events.ndjson"
+    OUTBOX_REDIS_STREAM: str = "product-events"
+    OUTBOX_REDIS_MAXLEN: int = 100000
+    OUTBOX_RELAY_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_RETENTION_HOURS: int = 168
+
+    # /ready and /health serve dependency health cached by a background check.
+    # Results older than the stale limit count as down; a pool saturation
+    # above HEALTH_POOL_SATURATION_MAX (0 disables) also fails readiness
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_STALE_AFTER_SECONDS: float = 20.0
+    HEALTH_POOL_SATURATION_MAX: float = 0.0
+
+    # Outbound service-to-service calls (app.core.http_client): one pooled
+    # client per process. Idempotent requests retry with jittered backoff;
+    # HEDGE_AFTER_MS > 0 duplicates slow idempotent requests; a host's circuit
+    # opens after BREAKER_FAILURES consecutive failures for BREAKER_RESET_SECONDS
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 100
+    HTTP_CLIENT_MAX_KEEPALIVE: int = 20
+    HTTP_CLIENT_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CLIENT_MAX_PER_HOST: int = 20
+    HTTP_CLIENT_CONNECT_TIMEOUT: float = 1.0
+    HTTP_CLIENT_TIMEOUT: float = 5.0
+    HTTP_CLIENT_RETRIES: int = 2
+    HTTP_CLIENT_BACKOFF_BASE_MS: float = 50.0
+    HTTP_CLIENT_BACKOFF_MAX_MS: float = 1000.0
+    HTTP_CLIENT_HEDGE_AFTER_MS: float = 0.0
+    HTTP_CLIENT_BREAKER_FAILURES: int = 5
+    HTTP_CLIENT_BREAKER_RESET_SECONDS: float = 10.0
+
+    # Latency budgets and slow-request profiling (app.core.profiling). Budgets
+    # are in ms; LATENCY_BUDGETS overrides per route, keyed "GET /api/x/{id}"
+    # or "/api/x/{id}". A request over budget arms the sampling profiler for
+    # its route; the next slow request there is kept (in memory, PROFILE_DIR if
+    # set, and /admin/profiles when PROFILE_ADMIN_TOKEN is set)
+    LATENCY_BUDGET_MS: float = 500.0
+    LATENCY_BUDGETS: Dict[str, float] = {}
+    PROFILE_ENABLED: bool = True
+    PROFILE_SAMPLE_RATE: float = 0.0
+    PROFILE_INTERVAL_MS: float = 1.0
+    PROFILE_COOLDOWN_SECONDS: float = 60.0
+    PROFILE_KEEP: int = 50
+    PROFILE_DIR: str = ""
+    PROFILE_ADMIN_TOKEN: str = ""
+
+    # Production server (python -m app.server): gunicorn + uvicorn workers.
+    # SERVER_WORKERS=0 sizes the pool from the container's CPU quota
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_WORKERS: int = 0
+    SERVER_MAX_WORKERS: int = 8
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE: int = 5
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    SERVER_PRELOAD: bool = True
+    SERVER_GRACEFUL_TIMEOUT: int = 25
+    SERVER_TIMEOUT: int = 60
     model_config = ConfigDict(extra="forbid")
 
 # Load settings
 settings = Settings()
 settings.IS_PRODUCTION = settings.ENV.lower() == "prod"
-
-# Example usage
-print(f"App running in {'production' if settings.IS_PRODUCTION else 'local'} mode")
-print(f"Database URL: {settings.DB_URL}")
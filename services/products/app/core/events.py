@@ -0,0 +1,92 @@
+import asyncio
+import json
+from collections import deque
+from typing import List
+
+from app.core.config import settings
+
+
+# =============================
+# EVENT SINKS
+# =============================
+# Where the outbox relay publishes product change events. Delivery is
+# at-least-once: a batch is re-sent if the relay fails before recording it as
+# published, so consumers should dedupe on "sequence".
+
+class EventSink:
+    async def publish(self, events: List[dict]) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class NullSink(EventSink):
+    """Publishes nowhere; events still get sequenced for the changes feed."""
+
+    async def publish(self, events: List[dict]) -> None:
+        pass
+
+
+class MemorySink(EventSink):
+    """Keeps the most recent events in process; a stand-in for tests and local runs."""
+
+    def __init__(self, max_events: int = 10000):
+        self.events = deque(maxlen=max_events)
+
+    async def publish(self, events: List[dict]) -> None:
+        self.events.extend(events)
+
+
+class FileSink(EventSink):
+    """Appends events as NDJSON lines to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+
+    async def publish(self, events: List[dict]) -> None:
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        await asyncio.to_thread(self._append, lines)
+
+
+class RedisStreamSink(EventSink):
+    """XADDs each event to a Redis stream, trimmed to roughly maxlen entries."""
+
+    def __init__(self, host: str, port: int, db: int, stream: str, maxlen: int):
+        # Imported lazily so the redis package is only needed when enabled
+        import redis.asyncio as redis
+
+        self.stream = stream
+        self.maxlen = maxlen
+        self._client = redis.Redis(host=host, port=port, db=db)
+
+    async def publish(self, events: List[dict]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {"event": json.dumps(event, default=str)}, maxlen=self.maxlen, approximate=True)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def build_event_sink() -> EventSink:
+    sink = settings.OUTBOX_SINK.lower()
+    if sink == "redis":
+        return RedisStreamSink(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            stream=settings.OUTBOX_REDIS_STREAM,
+            maxlen=settings.OUTBOX_REDIS_MAXLEN,
+        )
+    if sink == "file":
+        return FileSink(settings.OUTBOX_FILE_PATH)
+    if sink == "memory":
+        return MemorySink()
+    return NullSink()
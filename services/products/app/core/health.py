@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Gauge
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import get_engine, pool_status
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+dependency_up = Gauge(
+    'dependency_up',
+    'Result of the last background health check per dependency (1 = up)',
+    ['dependency']
+)
+
+dependency_check_seconds = Gauge(
+    'dependency_check_seconds',
+    'Duration of the last background health check per dependency',
+    ['dependency']
+)
+
+
+# =============================
+# HEALTH MONITOR
+# =============================
+
+@dataclass
+class DependencyStatus:
+    ok: bool
+    latency_ms: float
+    checked_at: float  # time.monotonic()
+    error: Optional[str] = None
+
+
+class HealthMonitor:
+    """
+    Dependency health refreshed in the background by the lifespan scheduler.
+    /ready and /health answer from the last results, so probes add no load to
+    the database however often they poll; results older than
+    HEALTH_STALE_AFTER_SECONDS count as down.
+    """
+
+    def __init__(self):
+        self.checks: Dict[str, Tuple[Callable[[], Awaitable[None]], bool]] = {}
+        self.results: Dict[str, DependencyStatus] = {}
+        self.started_at = time.monotonic()
+
+    def register(self, name: str, check: Callable[[], Awaitable[None]], critical: bool = True):
+        """critical=False dependencies are reported but don't affect readiness."""
+        self.checks[name] = (check, critical)
+
+    async def refresh(self):
+        await asyncio.gather(*(self._run(name, check) for name, (check, _) in self.checks.items()))
+
+    async def _run(self, name: str, check: Callable[[], Awaitable[None]]):
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.wait_for(check(), settings.HEALTH_CHECK_TIMEOUT_SECONDS)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}".rstrip(": ")
+        elapsed = time.perf_counter() - start
+
+        previous = self.results.get(name)
+        if error and (previous is None or previous.ok):
+            logger.warning(f"Health check '{name}' failed: {error}")
+        elif not error and previous is not None and not previous.ok:
+            logger.warning(f"Health check '{name}' recovered")
+
+        self.results[name] = DependencyStatus(error is None, elapsed * 1000, time.monotonic(), error)
+        dependency_up.labels(dependency=name).set(1 if error is None else 0)
+        dependency_check_seconds.labels(dependency=name).set(elapsed)
+
+    def readiness(self) -> Tuple[bool, dict]:
+        now = time.monotonic()
+        ready = True
+        dependencies = {}
+        for name, (_, critical) in self.checks.items():
+            result = self.results.get(name)
+            if result is None:
+                up, state = False, {"status": "unknown"}
+            else:
+                age = now - result.checked_at
+                up = result.ok and age <= settings.HEALTH_STALE_AFTER_SECONDS
+                state = {
+                    "status": "up" if up else ("stale" if result.ok else "down"),
+                    "latency_ms": round(result.latency_ms, 1),
+                    "age_seconds": round(age, 1),
+                }
+                if result.error:
+                    state["error"] = result.error
+            state["critical"] = critical
+            dependencies[name] = state
+            ready = ready and (up or not critical)
+
+        # A pool with every connection checked out can't take more traffic
+        pool = pool_status()
+        if pool is not None and 0 < settings.HEALTH_POOL_SATURATION_MAX <= pool["saturation"]:
+            ready = False
+
+        database = dependencies.get("database", {}).get("status")
+        return ready, {
+            "status": "OK" if ready else "Unavailable",
+            "database": "connected" if database == "up" else "disconnected",
+            "dependencies": dependencies,
+            "pool": pool,
+        }
+
+    def liveness(self) -> dict:
+        return {"status": "OK", "uptime_seconds": round(time.monotonic() - self.started_at, 1)}
+
+
+async def check_database():
+    async with get_engine().connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+health_monitor = HealthMonitor()
+health_monitor.register("database", check_database)
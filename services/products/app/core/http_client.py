@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+http_client_latency = Histogram(
+    'http_client_request_seconds',
+    'Outbound request latency per upstream host, method and status ("error" on transport failures)',
+    ['host', 'method', 'status']
+)
+
+http_client_retries = Counter(
+    'http_client_retries',
+    'Outbound requests retried after a transport error or retryable status',
+    ['host']
+)
+
+http_client_hedges = Counter(
+    'http_client_hedges',
+    'Hedged (duplicate) requests sent because the first was slow',
+    ['host']
+)
+
+http_client_rejected = Counter(
+    'http_client_rejected',
+    'Outbound requests refused locally because the host circuit was open',
+    ['host']
+)
+
+http_client_circuit_state = Gauge(
+    'http_client_circuit_state',
+    'Circuit breaker state per upstream host (0 closed, 1 half-open, 2 open)',
+    ['host']
+)
+
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+RETRY_STATUSES = frozenset((502, 503, 504))
+
+
+class CircuitOpen(Exception):
+    def __init__(self, host: str):
+        super().__init__(f"Circuit open for {host}")
+        self.host = host
+
+
+# =============================
+# CIRCUIT BREAKER
+# =============================
+
+class CircuitBreaker:
+    """
+    Per-host breaker: opens after `failure_threshold` consecutive failures
+    (transport errors or 5xx), rejects calls for `reset_timeout` seconds, then
+    lets a single trial request through; its outcome closes or re-opens it.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, host: str, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+
+    def _set_state(self, state: int):
+        if state != self.state:
+            logger.warning(f"Circuit for {self.host}: {self.state} -> {state}")
+        self.state = state
+        http_client_circuit_state.labels(host=self.host).set(state)
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set_state(self.HALF_OPEN)
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+        return self.state != self.OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_in_flight = False
+        self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+
+# =============================
+# SERVICE CLIENT
+# =============================
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: uniform over [0, capped exponential], so retrying callers spread out
+    ceiling = min(settings.HTTP_CLIENT_BACKOFF_MAX_MS, settings.HTTP_CLIENT_BACKOFF_BASE_MS * 2 ** (attempt - 1))
+    return random.uniform(0, ceiling) / 1000
+
+
+class ServiceClient:
+    """
+    Shared outbound HTTP client for service-to-service calls. One pooled
+    httpx.AsyncClient (keep-alive) per process, created on first use and
+    closed with the app lifespan, plus per-host concurrency limits, jittered
+    retries for idempotent requests, optional hedging and a circuit breaker.
+
+        response = await service_client.get("http://users-service:8001/api/users/7")
+    """
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE,
+                    keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(settings.HTTP_CLIENT_TIMEOUT, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT),
+            )
+        return self._client
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(
+                host, settings.HTTP_CLIENT_BREAKER_FAILURES, settings.HTTP_CLIENT_BREAKER_RESET_SECONDS
+            )
+        return self._breakers[host]
+
+    def _slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self._slots:
+            self._slots[host] = asyncio.Semaphore(settings.HTTP_CLIENT_MAX_PER_HOST)
+        return self._slots[host]
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        hedge_after_ms: Optional[float] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """
+        Send a request, retrying transport errors and 502/503/504 when the
+        request is idempotent (by method unless given). Hedging sends a second
+        copy of an idempotent request still pending after hedge_after_ms and
+        keeps the first answer. Raises CircuitOpen without touching the
+        network while the host's breaker is open.
+        """
+        method = method.upper()
+        host = httpx.URL(url).netloc.decode("ascii")
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        if hedge_after_ms is None:
+            hedge_after_ms = settings.HTTP_CLIENT_HEDGE_AFTER_MS
+        attempts = 1 + (settings.HTTP_CLIENT_RETRIES if idempotent else 0)
+        breaker = self.breaker(host)
+
+        for attempt in range(attempts):
+            if attempt:
+                http_client_retries.labels(host=host).inc()
+                await asyncio.sleep(_backoff(attempt))
+            if not breaker.allow():
+                http_client_rejected.labels(host=host).inc()
+                raise CircuitOpen(host)
+            last = attempt == attempts - 1
+            try:
+                if idempotent and hedge_after_ms > 0:
+                    response = await self._send_hedged(method, url, host, hedge_after_ms / 1000, kwargs)
+                else:
+                    response = await self._send(method, url, host, kwargs)
+            except httpx.TransportError:
+                breaker.record_failure()
+                if last:
+                    raise
+                continue
+            except BaseException:
+                # Cancelled (caller timeout, client disconnect) or failed otherwise:
+                # still an outcome, or a half-open trial would stay in flight forever
+                breaker.record_failure()
+                raise
+
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            if response.status_code in RETRY_STATUSES and not last:
+                continue
+            return response
+
+    async def _send(self, method: str, url: str, host: str, kwargs: dict) -> httpx.Response:
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with self._slot(host):
+                response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            http_client_latency.labels(host=host, method=method, status=status).observe(time.perf_counter() - start)
+
+    async def _send_hedged(self, method: str, url: str, host: str, hedge_after: float, kwargs: dict) -> httpx.Response:
+        first = asyncio.create_task(self._send(method, url, host, kwargs))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=hedge_after)
+            if done:
+                return first.result()
+
+            http_client_hedges.labels(host=host).inc()
+            pending.add(asyncio.create_task(self._send(method, url, host, kwargs)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Process-wide client; lifespan closes it on shutdown
+service_client = ServiceClient()
@@ -1,13 +1,17 @@
 import platform
 import logging
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.core.config import settings  # use the cleaned-up Settings model
-from app.db.session import async_engine, Base
+from app.core.geoip import geo_enricher
+from app.core.health import health_monitor
+from app.core.http_client import service_client
+from app.db.session import AsyncSessionLocal, dispose_engine, get_engine
+from app.services.product_events_service import ProductEventsService, event_sink
+from app.services.products_service import product_cache, product_cache_sync
 
 logger = logging.getLogger(__name__)
 
@@ -16,21 +20,74 @@ def format_time(dt: datetime) -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Imported here: only serving processes need the scheduler, not importers of the app
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
     scheduler = AsyncIOScheduler()
     try:
         # Store config
         app.state.settings = settings
         environment = "production" if settings.IS_PRODUCTION else "sandbox"
 
-        # Create tables
-        async with async_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        # Engine and pool belong to this worker; the schema is created
+        # beforehand by `python -m app.db.migrate`, not on every boot
+        get_engine()
+
+        # Dependency health for /ready, checked now and then on an interval.
+        # Cache failures fall back to the database, so they don't gate readiness
+        if settings.CACHE_BACKEND.lower() == "redis":
+            health_monitor.register("cache", lambda: product_cache.backend.ping(), critical=False)
+        await health_monitor.refresh()
 
         # Scheduler job example
         async def housekeeping():
             logger.info("Housekeeping tick")
 
+        # Outbox relay: publish committed change events, then drop old published ones
+        async def relay_outbox():
+            async with AsyncSessionLocal() as db:
+                try:
+                    await ProductEventsService.relay(db, event_sink, settings.OUTBOX_BATCH_SIZE)
+                except Exception as e:
+                    logger.warning(f"Outbox relay failed, retrying next tick: {e}")
+
+        async def prune_outbox():
+            before = datetime.now(timezone.utc) - timedelta(hours=settings.OUTBOX_RETENTION_HOURS)
+            async with AsyncSessionLocal() as db:
+                await ProductEventsService.prune(db, before)
+
+        # A memory cache only sees this worker's writes; drop rows other workers
+        # and replicas changed as their events get published
+        sync_cache = settings.CACHE_BACKEND.lower() == "memory"
+
+        async def sync_product_cache():
+            async with AsyncSessionLocal() as db:
+                try:
+                    await product_cache_sync.poll(db, settings.OUTBOX_BATCH_SIZE)
+                except Exception as e:
+                    logger.warning(f"Product cache sync failed, retrying next tick: {e}")
+
+        if sync_cache:
+            await sync_product_cache()
+
+        # Background geo enrichment for request metrics
+        await geo_enricher.start()
+
         scheduler.add_job(housekeeping, "interval", minutes=5)
+        scheduler.add_job(
+            health_monitor.refresh, "interval", seconds=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+            max_instances=1, coalesce=True
+        )
+        if settings.OUTBOX_RELAY_ENABLED:
+            scheduler.add_job(
+                relay_outbox, "interval", seconds=settings.OUTBOX_RELAY_INTERVAL_SECONDS, max_instances=1, coalesce=True
+            )
+            scheduler.add_job(prune_outbox, "interval", hours=1, max_instances=1, coalesce=True)
+        if sync_cache:
+            scheduler.add_job(
+                sync_product_cache, "interval", seconds=settings.CACHE_SYNC_INTERVAL_SECONDS,
+                max_instances=1, coalesce=True
+            )
         scheduler.start()
         app.state.scheduler = scheduler
 
@@ -56,6 +113,11 @@ async def lifespan(app: FastAPI):
         # Shutdown
         if scheduler.running:
             scheduler.shutdown(wait=False)
+        await geo_enricher.stop()
+        await product_cache.close()
+        await event_sink.close()
+        await service_client.close()
+        await dispose_engine()
         logger.info(
             "\n=========================================\n"
             "          Application Shutdown           \n"
@@ -0,0 +1,101 @@
+import time
+from typing import Dict, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from app.core.geoip import geo_enricher
+from app.core.profiling import RequestTimings, request_timings, slow_requests
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+endpoint_clicks = Counter(
+    'endpoint_clicks',
+    'Total clicks per endpoint',
+    ['endpoint']
+)
+
+endpoint_latency = Histogram(
+    'endpoint_latency_seconds',
+    'Endpoint response time',
+    ['endpoint']
+)
+
+error_counter = Counter(
+    'endpoint_errors',
+    'Total errors per endpoint and status code',
+    ['endpoint', 'status_code']
+)
+
+# Label used for requests that matched no route (404s, scanners, ...)
+UNMATCHED_ROUTE = "unmatched"
+SKIP_ENDPOINTS = frozenset(("/favicon.ico", "/metrics"))
+
+
+def route_label(scope) -> str:
+    """Matched route template (e.g. /api/users/{user_id}), never the raw path."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+# =============================
+# METRICS MIDDLEWARE
+# =============================
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: no BaseHTTPMiddleware task/stream wrapping. Labels
+    by route template so series count is bounded by the number of routes, and
+    caches bound label children so the hot path allocates no label dicts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._bound: Dict[str, Tuple] = {}
+        self._bound_errors: Dict[str, object] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        timings = RequestTimings()
+        token = request_timings.set(timings)
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            # Track unhandled errors
+            endpoint = route_label(scope)
+            errors = self._bound_errors.get(endpoint)
+            if errors is None:
+                errors = self._bound_errors[endpoint] = error_counter.labels(endpoint=endpoint, status_code="500")
+            errors.inc()
+            raise
+        finally:
+            request_timings.reset(token)
+        elapsed = (time.perf_counter_ns() - start) / 1e9
+
+        endpoint = route_label(scope)
+
+        # Skip internal endpoints
+        if endpoint in SKIP_ENDPOINTS:
+            return
+
+        bound = self._bound.get(endpoint)
+        if bound is None:
+            bound = self._bound[endpoint] = (
+                endpoint_clicks.labels(endpoint=endpoint),
+                endpoint_latency.labels(endpoint=endpoint),
+            )
+        clicks, latency = bound
+        clicks.inc()
+        latency.observe(elapsed)
+        await slow_requests.finish(scope["method"], endpoint, elapsed, timings)
+
+        # Resolved and counted in the background, never on the request path
+        client = scope.get("client")
+        if client:
+            geo_enricher.submit(client[0])
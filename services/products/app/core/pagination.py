@@ -0,0 +1,56 @@
+import base64
+import json
+from typing import Optional, Tuple
+
+
+# Cursors are opaque to clients: a urlsafe base64 wrapper around the last seen
+# primary key. Keyset pagination ("WHERE id > :last_id ORDER BY id LIMIT n")
+# keeps the cost of every page flat, unlike OFFSET which scans skipped rows.
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+def _valid_id(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+def encode_cursor(last_id: int) -> str:
+    return _encode({"id": last_id})
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    last_id = _decode(cursor).get("id")
+    if not _valid_id(last_id):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+# Ranked results (search) page on (rank DESC, id ASC), so the cursor carries both
+
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    return _encode({"rank": rank, "id": last_id})
+
+
+def decode_rank_cursor(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    if not cursor:
+        return None
+    payload = _decode(cursor)
+    rank, last_id = payload.get("rank"), payload.get("id")
+    if not isinstance(rank, (int, float)) or isinstance(rank, bool) or not _valid_id(last_id):
+        raise ValueError("Invalid cursor")
+    return float(rank), last_id
@@ -0,0 +1,52 @@
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple, Type
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.core.profiling import span
+from app.db.session import Base
+
+
+@lru_cache(maxsize=None)
+def _field_names(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+
+def dump_orm(row: Base, schema: Type[BaseModel]) -> dict:
+    """
+    Plain dict of the schema's fields read off an ORM row, without validation.
+    Only valid for schemas whose fields map 1:1 onto JSON-native column values
+    (no aliases, validators or computed fields).
+    """
+    return {name: getattr(row, name) for name in _field_names(schema)}
+
+
+def _validated(row: Base, schema: Type[BaseModel]) -> dict:
+    return schema.model_validate(row, from_attributes=True).model_dump(mode="json")
+
+
+def _dump(content: Any, schema: Type[BaseModel], dump: Callable[[Base, Type[BaseModel]], dict]) -> Any:
+    if isinstance(content, Base):
+        return dump(content, schema)
+    if isinstance(content, (list, tuple)):
+        return [_dump(item, schema, dump) for item in content]
+    if isinstance(content, dict):
+        return {key: _dump(value, schema, dump) for key, value in content.items()}
+    return content
+
+
+def orm_response(content: Any, schema: Type[BaseModel], headers: Optional[dict] = None) -> ORJSONResponse:
+    """
+    orjson response for content holding ORM rows (a row, a list, or a dict
+    such as a page) rendered through schema. With SKIP_RESPONSE_VALIDATION the
+    rows are dumped without validation; otherwise each row is validated
+    against schema first. Either way FastAPI does not re-validate the result
+    against the route's response_model.
+    """
+    dump = dump_orm if settings.SKIP_RESPONSE_VALIDATION else _validated
+    with span("validation"):
+        body = _dump(content, schema, dump)
+    with span("encoding"):
+        return ORJSONResponse(body, headers=headers)
@@ -0,0 +1,105 @@
+import bisect
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Search ranking shared by both backends: a text score below 1, plus boosts
+# when the query is a prefix of the sku or name, so exact-ish hits come first
+SKU_PREFIX_BOOST = 1.0
+NAME_PREFIX_BOOST = 0.5
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def like_prefix(query: str) -> str:
+    """ILIKE pattern matching values that start with query, wildcards escaped."""
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+class InvertedIndex:
+    """
+    Per-process token -> product id postings, used as the search backend when
+    the database has no full-text support (SQLite in tests and local runs).
+    Loaded from the database on first search; writes through ProductsService
+    keep it current, and reset() forces a reload.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self._postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._docs: Dict[int, Tuple[str, str, Tuple[str, ...]]] = {}
+        self._prefix_keys: Optional[List[Tuple[str, int, float]]] = None
+
+    def load(self, rows: Iterable[Tuple[int, str, str, Optional[str]]]):
+        self.reset()
+        for row in rows:
+            self._add(*row)
+        self.loaded = True
+
+    def reset(self):
+        self.loaded = False
+        self._postings.clear()
+        self._docs.clear()
+        self._prefix_keys = None
+
+    def add(self, product_id: int, sku: str, name: str, description: Optional[str]):
+        if self.loaded:
+            self._add(product_id, sku, name, description)
+
+    def remove(self, product_id: int):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for token in doc[2]:
+            postings = self._postings[token]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+        self._prefix_keys = None
+
+    def search(self, query: str) -> List[Tuple[float, int]]:
+        """(rank, product id) pairs, best first, ties broken by id."""
+        scores: Dict[int, float] = {}
+
+        # Every query term must appear (AND), like websearch_to_tsquery
+        terms = set(tokenize(query))
+        if terms:
+            postings = sorted((self._postings.get(term, {}) for term in terms), key=len)
+            for product_id in set(postings[0]).intersection(*postings[1:]):
+                score = sum(p[product_id] / (p[product_id] + 1) for p in postings) / len(postings)
+                scores[product_id] = score
+
+        prefix = query.strip().lower()
+        if prefix:
+            keys = self._sorted_prefix_keys()
+            i = bisect.bisect_left(keys, (prefix,))
+            while i < len(keys) and keys[i][0].startswith(prefix):
+                _, product_id, boost = keys[i]
+                scores[product_id] = scores.get(product_id, 0.0) + boost
+                i += 1
+
+        return sorted(((rank, product_id) for product_id, rank in scores.items()), key=lambda hit: (-hit[0], hit[1]))
+
+    def _add(self, product_id: int, sku: str, name: str, description: Optional[str]):
+        self.remove(product_id)
+        counts = Counter(tokenize(name) + tokenize(description))
+        for token, frequency in counts.items():
+            self._postings[token][product_id] = frequency
+        self._docs[product_id] = (sku.lower(), name.lower(), tuple(counts))
+        self._prefix_keys = None
+
+    def _sorted_prefix_keys(self) -> List[Tuple[str, int, float]]:
+        # Rebuilt lazily after writes; prefix lookups are then a bisect
+        if self._prefix_keys is None:
+            keys = []
+            for product_id, (sku, name, _) in self._docs.items():
+                keys.append((sku, product_id, SKU_PREFIX_BOOST))
+                keys.append((name, product_id, NAME_PREFIX_BOOST))
+            keys.sort()
+            self._prefix_keys = keys
+        return self._prefix_keys
@@ -0,0 +1,77 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from prometheus_client import Counter
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+singleflight_calls = Counter(
+    'singleflight_calls',
+    'Coalesced lookups per group and role (leader ran the query, coalesced shared its result)',
+    ['group', 'result']
+)
+
+
+# =============================
+# SINGLE-FLIGHT
+# =============================
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller (the leader)
+    runs the function, callers arriving while it is in flight await the same
+    result, or the same exception. Nothing is kept once the call completes.
+
+    The leader's function runs in the leader's task (and on its DB session),
+    so it must return something safe to share, e.g. a plain dict snapshot.
+    If the leader is cancelled, waiting callers start a new flight rather than
+    fail; a waiter being cancelled never affects the others.
+    """
+
+    def __init__(self, group: str):
+        self.group = group
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self._leaders = singleflight_calls.labels(group=group, result="leader")
+        self._coalesced = singleflight_calls.labels(group=group, result="coalesced")
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._coalesced.inc()
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: take over the lookup
+                if not flight.cancelled():
+                    raise
+                return await self.do(key, fn)
+
+        self._leaders.inc()
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            value = await fn()
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                flight.cancel()
+            else:
+                flight.set_exception(exc)
+                # Mark as retrieved so an unawaited failure isn't logged twice
+                flight.exception()
+            raise
+        else:
+            flight.set_result(value)
+            return value
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Detach an in-flight call so later callers run a fresh one (after a write)."""
+        self._flights.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._flights)
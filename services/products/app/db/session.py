@@ -1,10 +1,14 @@
 
 
-from typing import Any, AsyncGenerator
-from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm import as_declarative
+import time
+from typing import Any, AsyncGenerator, Optional
+from prometheus_client import Gauge, Histogram
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import as_declarative, declared_attr
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from app.core.profiling import add_phase, instrument_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession, async_sessionmaker
 
 
 
@@ -24,20 +28,113 @@ class Base:
 
 DATABASE_URL = settings.DB_URL
 
-# Print the type of DATABASE_URL
-print(f"Type of DATABASE_URL: {type(DATABASE_URL)}")
-# For logging purposes
-print(f"Database URL: {DATABASE_URL}")
-    
-# Create the SQLAlchemy  async engine and sessionmaker
-async_engine = create_async_engine(DATABASE_URL, echo=True, future=True, )
+# =============================
+# CONNECTION POOL
+# =============================
+
+db_pool_checkout_wait = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting to check a connection out of the pool'
+)
+
+db_pool_connections = Gauge(
+    'db_pool_connections',
+    'Connection pool usage by state',
+    ['state']
+)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            db_pool_checkout_wait.observe(elapsed)
+            add_phase("db_checkout", elapsed)
+
+
+def engine_options(url: str) -> dict:
+    options = {"echo": settings.DB_ECHO, "future": True}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        # SQLite uses its own single-connection pooling
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if url.get_driver_name() == "asyncpg":
+        connect_args = {"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE}
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        options["connect_args"] = connect_args
+    return options
+
+
+def instrument_pool(engine):
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedQueuePool):
+        return
+    db_pool_connections.labels(state="checked_out").set_function(pool.checkedout)
+    db_pool_connections.labels(state="idle").set_function(pool.checkedin)
+    db_pool_connections.labels(state="overflow").set_function(lambda: max(0, pool.overflow()))
+    db_pool_connections.labels(state="capacity").set_function(lambda: pool.size() + settings.DB_MAX_OVERFLOW)
+
+
+def pool_status(engine=None) -> Optional[dict]:
+    """Checked-out connections against capacity; None for SQLite's own pooling."""
+    engine = engine or _engine
+    pool = engine.sync_engine.pool if engine is not None else None
+    if not isinstance(pool, InstrumentedQueuePool):
+        return None
+    capacity = pool.size() + settings.DB_MAX_OVERFLOW
+    in_use = pool.checkedout()
+    return {"in_use": in_use, "capacity": capacity, "saturation": round(in_use / capacity, 3)}
+
+
+# =============================
+# ENGINE
+# =============================
+
+# Session factory, bound to the engine when it is first created
+AsyncSessionLocal = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    The process' engine, created on first use rather than at import: the
+    driver dialect loads only when needed, and a gunicorn master that preloads
+    the app never owns a pool its forked workers would inherit.
+    """
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+        instrument_pool(_engine)
+        instrument_engine(_engine)
+        AsyncSessionLocal.configure(bind=_engine)
+    return _engine
 
-# Create a session factory
 
-AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+async def dispose_engine():
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
 
 
 # Create a dependency to get the async database session
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    get_engine()
     async with AsyncSessionLocal() as session:
         yield session
\ No newline at end of file
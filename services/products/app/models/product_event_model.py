@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String
+from app.db.session import Base
+
+
+# BIGINT in Postgres; SQLite only autoincrements an INTEGER primary key
+EventId = BigInteger().with_variant(Integer, "sqlite")
+
+
+class ProductEvent(Base):
+    """
+    Transactional outbox: one row per product change, written in the same
+    transaction as the change itself. The relay assigns `sequence` (publish
+    order, gap-free per relay batch) when it hands the event to the sink; the
+    changes feed pages on it.
+    """
+    __tablename__ = "product_events"
+    id = Column(EventId, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, nullable=False)
+    # created | updated | deleted
+    event_type = Column(String(16), nullable=False)
+    # Row snapshot after the change (before it, for deletes)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+    sequence = Column(BigInteger, unique=True)
+    published_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        # The relay's "next unpublished events" scan stays small however long the history
+        Index("ix_product_events_pending", "id", postgresql_where=sequence.is_(None), sqlite_where=sequence.is_(None)),
+    )
+
+    def __repr__(self):
+        return f"<ProductEvent(id={self.id}, product_id={self.product_id}, event_type={self.event_type}, sequence={self.sequence})>"
@@ -1,6 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text
+from sqlalchemy import DDL, Column, Integer, String, Float, Boolean, Text, Index, event, func, literal_column
 from app.db.session import Base
 
+# Text search configuration and separators are inlined as literals so queries
+# and the index share the exact same expression (bind parameters would not
+# match the index)
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+
+EMPTY = literal_column("''", String)
+SPACE = literal_column("' '", String)
+
+
+def _search_document(name, description):
+    return func.to_tsvector(SEARCH_CONFIG, func.coalesce(name, EMPTY) + SPACE + func.coalesce(description, EMPTY))
+
+
 class Product(Base):
     __tablename__ = "products"
     id = Column(Integer, primary_key=True, index=True)
@@ -10,6 +24,34 @@ class Product(Base):
     price = Column(Float, nullable=False)
     stock = Column(Integer, default=0)
     is_active = Column(Boolean, default=True, nullable=False)
+    # Bumped by every write; drives ETags and optimistic concurrency
+    version = Column(Integer, default=1, server_default="1", nullable=False)
+
+    __table_args__ = (
+        # Keyset listing filters: equality/range column first, then id for ordering
+        Index("ix_products_is_active_id", "is_active", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        # LIKE 'prefix%' only uses a btree index under pattern ops in Postgres
+        Index("ix_products_sku_pattern", "sku", postgresql_ops={"sku": "varchar_pattern_ops"}),
+        # Search (Postgres only): full-text over name + description, and
+        # trigram indexes serving ILIKE 'prefix%' on sku and name
+        Index("ix_products_search", _search_document(name, description), postgresql_using="gin")
+        .ddl_if(dialect="postgresql"),
+        Index("ix_products_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+        .ddl_if(dialect="postgresql"),
+    )
 
     def __repr__(self):
-        return f"<Product(id={self.id}, sku={self.sku}, name={self.name}, price={self.price}, stock={self.stock})>"
\ No newline at end of file
+        return f"<Product(id={self.id}, sku={self.sku}, name={self.name}, price={self.price}, stock={self.stock})>"
+
+
+# Full-text document for search; queries must use this to hit ix_products_search
+search_document = _search_document(Product.name, Product.description)
+
+# gin_trgm_ops comes from the pg_trgm extension. Hooked on the metadata, not the
+# table, so it also runs when migrate adds the trigram indexes to an existing table
+event.listen(
+    Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
@@ -1,17 +1,135 @@
-from fastapi import APIRouter, Depends
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.http_cache import conditional_orm_response, if_match_version, row_etag, rows_etag
+from app.core.pagination import decode_cursor, decode_rank_cursor, encode_cursor, encode_rank_cursor
+from app.core.profiling import TimedRoute
+from app.core.responses import orm_response
+from app.core.streaming import NDJSON_MEDIA_TYPE, iter_ndjson_lines, ndjson_response
 from app.db.session import get_db
-from app.services.products_service import ProductsService
-from app.schemas.products_schema import ProductCreate, ProductRead
-from typing import List
+from app.services.product_events_service import ChangesExpired, ProductEventsService
+from app.services.products_service import InsufficientStock, ProductsService, UnknownSkus, VersionConflict
+from app.schemas.products_schema import (
+    ProductBatch, ProductBulkResult, ProductChange, ProductChangePage, ProductCreate, ProductPage, ProductRead,
+    ProductUpdate, StockRequest, StockResult,
+)
+from typing import List, Optional, Union
 
 
-router = APIRouter(tags=["products"])
+router = APIRouter(tags=["products"], route_class=TimedRoute)
 
+# The only product column a PATCH may set to null
+NULLABLE_UPDATE_FIELDS = {"description"}
 
-@router.get("/", response_model=List[ProductRead])
-async def list_products(db: AsyncSession = Depends(get_db)):
-    return await ProductsService.list(db)
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > settings.BATCH_IDS_MAX:
+        raise HTTPException(status_code=400, detail=f"ids must contain 1 to {settings.BATCH_IDS_MAX} ids")
+    return ids
+
+
+# ?ids=1,2,3 switches to a batch lookup: items in request order, unknown ids in "missing"
+@router.get("/", response_model=Union[ProductBatch, ProductPage])
+async def list_products(
+    request: Request,
+    ids: Optional[str] = Query(None, description="Comma-separated product ids to fetch in one query"),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sku_prefix: Optional[str] = Query(None, max_length=64),
+    db: AsyncSession = Depends(get_db),
+):
+    cache_control = settings.HTTP_CACHE_CONTROL_LIST
+    if ids is not None:
+        product_ids = _parse_ids(ids)
+        found = await ProductsService.get_many(db, product_ids)
+        items = [found[product_id] for product_id in product_ids if product_id in found]
+        missing = [product_id for product_id in product_ids if product_id not in found]
+        return conditional_orm_response(
+            request, rows_etag(items, missing), cache_control, {"items": items, "missing": missing}, ProductRead
+        )
+
+    try:
+        after_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items, has_more = await ProductsService.list_page(
+        db,
+        limit=limit,
+        after_id=after_id,
+        is_active=is_active,
+        min_price=min_price,
+        max_price=max_price,
+        sku_prefix=sku_prefix,
+    )
+    next_cursor = encode_cursor(items[-1].id) if has_more else None
+    return conditional_orm_response(
+        request, rows_etag(items, next_cursor), cache_control, {"items": items, "next_cursor": next_cursor}, ProductRead
+    )
+
+
+# Full catalog dump as NDJSON; declared before /{product_id} so it isn't captured
+@router.get("/export")
+async def export_products(db: AsyncSession = Depends(get_db)):
+    return ndjson_response(ProductsService.stream(db, settings.EXPORT_CHUNK_SIZE), ProductRead)
+
+
+# Ranked full-text + sku/name prefix search; declared before /{product_id}
+@router.get("/search", response_model=ProductPage)
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="q must not be blank")
+    try:
+        after = decode_rank_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    hits, has_more = await ProductsService.search(db, q, limit=limit, after=after, is_active=is_active)
+    next_cursor = encode_rank_cursor(hits[-1][1], hits[-1][0].id) if has_more else None
+    items = [product for product, _ in hits]
+    return conditional_orm_response(
+        request, rows_etag(items, next_cursor), settings.HTTP_CACHE_CONTROL_LIST,
+        {"items": items, "next_cursor": next_cursor}, ProductRead,
+    )
+
+
+# Change feed for incremental sync: created/updated/deleted events in publish order.
+# Start without `since`, then keep polling with next_cursor; 410 means the cursor
+# fell out of retention and the consumer must resync from a full listing/export.
+# Declared before /{product_id}
+@router.get("/changes", response_model=ProductChangePage)
+async def product_changes(
+    since: Optional[str] = None,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        after = decode_cursor(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        events, has_more = await ProductEventsService.changes(db, after, limit)
+    except ChangesExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+
+    next_cursor = encode_cursor(events[-1].sequence if events else after or 0)
+    return orm_response({"items": events, "next_cursor": next_cursor, "has_more": has_more}, ProductChange)
 
 
 @router.post("/", response_model=ProductRead)
@@ -19,14 +137,105 @@ async def create_product(product: ProductCreate, db: AsyncSession = Depends(get_
     return await ProductsService.create(db, product.dict())
 
 
+async def _json_array_items(payload: list):
+    for item in payload:
+        yield item
+
+
+async def _ndjson_items(request: Request):
+    async for line in iter_ndjson_lines(request.stream()):
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+# Upsert by sku from a JSON array, or an NDJSON stream for large feeds
+@router.post("/bulk", response_model=ProductBulkResult)
+async def bulk_upsert_products(request: Request, db: AsyncSession = Depends(get_db)):
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        items = _ndjson_items(request)
+    else:
+        try:
+            payload = json.loads(await request.body())
+        except ValueError:
+            payload = None
+        if not isinstance(payload, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        items = _json_array_items(payload)
+
+    return await ProductsService.bulk_ingest(db, items, settings.BULK_BATCH_SIZE, settings.BULK_MAX_ERRORS)
+
+
+async def _change_stock(change, request: StockRequest, db: AsyncSession):
+    if len(request.items) > settings.STOCK_ITEMS_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.STOCK_ITEMS_MAX} items per request")
+    try:
+        levels = await change(db, [(item.sku, item.quantity) for item in request.items])
+    except UnknownSkus as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientStock as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"items": [{"sku": sku, "stock": stock} for sku, stock in levels.items()]}
+
+
+# Take stock for a whole basket in one transaction: every item or none
+@router.post("/stock/reserve", response_model=StockResult)
+async def reserve_stock(request: StockRequest, db: AsyncSession = Depends(get_db)):
+    return await _change_stock(ProductsService.reserve_stock, request, db)
+
+
+# Give back stock from a cancelled or expired reservation
+@router.post("/stock/release", response_model=StockResult)
+async def release_stock(request: StockRequest, db: AsyncSession = Depends(get_db)):
+    return await _change_stock(ProductsService.release_stock, request, db)
+
+
 @router.get("/{product_id}", response_model=ProductRead)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
-    return await ProductsService.get(db, product_id)
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    product = await ProductsService.get(db, product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return conditional_orm_response(request, row_etag(product), settings.HTTP_CACHE_CONTROL_DETAIL, product, ProductRead)
+
+
+# Partial update: only the supplied fields are written, in one UPDATE ... RETURNING.
+# Send the version last read (If-Match: <etag>, or "version" in the body) to get
+# a 409 instead of silently overwriting a concurrent change
+@router.patch("/{product_id}", response_model=ProductRead)
+async def update_product(product_id: int, update: ProductUpdate, request: Request, db: AsyncSession = Depends(get_db)):
+    changes = update.model_dump(exclude_unset=True)
+    expected_version = changes.pop("version", None)
+    try:
+        header_version = if_match_version(request, product_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if header_version is not None:
+        if expected_version is not None and expected_version != header_version:
+            raise HTTPException(status_code=400, detail="If-Match and version disagree")
+        expected_version = header_version
+
+    nulls = sorted(field for field, value in changes.items() if value is None and field not in NULLABLE_UPDATE_FIELDS)
+    if nulls:
+        raise HTTPException(status_code=400, detail=f"Cannot set to null: {', '.join(nulls)}")
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+
+    try:
+        product = await ProductsService.update(db, product_id, changes, expected_version)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return orm_response(product, ProductRead, headers={"ETag": row_etag(product)})
 
 
 @router.delete("/{product_id}", response_model=ProductRead)
 async def delete_product(product_id: int, db: AsyncSession = Depends(get_db)):
-    return await ProductsService.delete(db, product_id)
+    product = await ProductsService.delete(db, product_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
 
 
 # from fastapi import APIRouter, Depends
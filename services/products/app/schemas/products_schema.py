@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 
 class ProductBase(BaseModel):
     sku: str
@@ -13,17 +14,65 @@ class ProductCreate(ProductBase):
     pass
 
 class ProductRead(ProductBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
 
-    class Config:
-        orm_mode = True
+class ProductPage(BaseModel):
+    items: List[ProductRead]
+    next_cursor: Optional[str] = None
+
+class ProductBatch(BaseModel):
+    items: List[ProductRead]
+    missing: List[int]
+
+class ProductBulkError(BaseModel):
+    index: int
+    sku: Optional[str] = None
+    error: str
+
+class ProductBulkResult(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: List[ProductBulkError]
+
+class StockItem(BaseModel):
+    sku: str
+    quantity: int = Field(gt=0)
+
+class StockRequest(BaseModel):
+    items: List[StockItem] = Field(min_length=1)
+
+class StockLevel(BaseModel):
+    sku: str
+    stock: int
+
+class StockResult(BaseModel):
+    items: List[StockLevel]
+
+class ProductChange(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    sequence: int
+    event_type: str
+    product_id: int
+    payload: dict
+    created_at: datetime
+
+class ProductChangePage(BaseModel):
+    items: List[ProductChange]
+    # Always set: poll again with it to get the changes after this page
+    next_cursor: str
+    has_more: bool
 
 class ProductUpdate(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     name: Optional[str] = None
     description: Optional[str] = None
     price: Optional[float] = None
     stock: Optional[int] = None
     is_active: Optional[bool] = None
-
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    # Version the client last read; if the row has changed since, the update fails with 409
+    version: Optional[int] = None
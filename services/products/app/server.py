@@ -0,0 +1,121 @@
+"""
+Production launcher: gunicorn managing uvicorn workers, sized to the CPU the
+container is actually allowed to use.
+
+    python -m app.server            # workers from the cgroup CPU quota
+    SERVER_WORKERS=2 python -m app.server
+"""
+import importlib.util
+import logging
+import math
+import os
+from typing import Optional
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class Worker(UvicornWorker):
+    # Explicit rather than "auto" so a missing wheel shows up in the startup log
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+    }
+
+
+# =============================
+# CPU LIMIT DETECTION
+# =============================
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPUs granted by the container's CFS quota (cgroup v2, then v1), None if unlimited."""
+    cpu_max = _read("/sys/fs/cgroup/cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+        return None
+    quota = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        # One async worker per granted core; a fractional quota still gets one
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, min(cpus, settings.SERVER_MAX_WORKERS))
+
+
+# =============================
+# GUNICORN APPLICATION
+# =============================
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+        return app
+
+
+def options() -> dict:
+    return {
+        "bind": f"{settings.SERVER_HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": "app.server.Worker",
+        "backlog": settings.SERVER_BACKLOG,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        # Recycle workers periodically (jittered so they don't restart together)
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        # Import the app once in the master so workers share its pages copy-on-write;
+        # connections, pools and background tasks are only created in each worker's lifespan
+        "preload_app": settings.SERVER_PRELOAD,
+        # SIGTERM: stop accepting, let in-flight requests and lifespan shutdown finish
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "timeout": settings.SERVER_TIMEOUT,
+        "accesslog": None,
+        "errorlog": "-",
+    }
+
+
+def main():
+    config = options()
+    logger.warning(
+        f"Starting {config['workers']} worker(s) on {config['bind']} "
+        f"(loop={Worker.CONFIG_KWARGS['loop']}, http={Worker.CONFIG_KWARGS['http']}, cpu_limit={cgroup_cpu_limit()})"
+    )
+    Server(config).run()
+
+
+if __name__ == "__main__":
+    main()
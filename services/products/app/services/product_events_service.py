@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.events import EventSink, build_event_sink
+from app.models.product_event_model import ProductEvent
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+outbox_events_published = Counter(
+    'outbox_events_published',
+    'Product change events handed to the event sink'
+)
+
+outbox_relay_failures = Counter(
+    'outbox_relay_failures',
+    'Outbox relay batches that failed and will be retried'
+)
+
+outbox_relay_lag = Gauge(
+    'outbox_relay_lag_seconds',
+    'Age of the oldest event in the last published batch'
+)
+
+
+# Relays in other workers and replicas skip their tick rather than interleave sequences
+RELAY_LOCK_KEY = 0x70726F64
+
+# Sink the relay publishes to, per process
+event_sink = build_event_sink()
+
+
+class ChangesExpired(Exception):
+    """The requested cursor is older than the retained event history."""
+
+
+async def record_events(db: AsyncSession, events: List[Tuple[str, dict]]):
+    """Queue (event_type, row snapshot) change events in the caller's transaction."""
+    if events:
+        await db.execute(
+            ProductEvent.__table__.insert(),
+            [{"product_id": row["id"], "event_type": event_type, "payload": row} for event_type, row in events],
+        )
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _message(event: ProductEvent) -> dict:
+    return {
+        "id": event.id,
+        "sequence": event.sequence,
+        "event_type": event.event_type,
+        "product_id": event.product_id,
+        "payload": event.payload,
+        "created_at": _utc(event.created_at).isoformat(),
+    }
+
+
+class ProductEventsService:
+
+    # Publish pending outbox events to the sink in id order, numbering them as they go
+    # Drains up to max_batches batches; returns the number of events published
+    @staticmethod
+    async def relay(db: AsyncSession, sink: EventSink, batch_size: int, max_batches: int = 10):
+        published = 0
+        for _ in range(max_batches):
+            count = await ProductEventsService._relay_batch(db, sink, batch_size)
+            published += count
+            if count < batch_size:
+                break
+        return published
+
+    @staticmethod
+    async def _relay_batch(db: AsyncSession, sink: EventSink, batch_size: int) -> int:
+        try:
+            # One relay at a time, so sequence follows publish order with no gaps;
+            # a late-committing transaction's events just get the next numbers
+            if db.get_bind().dialect.name == "postgresql":
+                if not await db.scalar(select(func.pg_try_advisory_xact_lock(RELAY_LOCK_KEY))):
+                    await db.rollback()
+                    return 0
+            result = await db.execute(
+                select(ProductEvent).where(ProductEvent.sequence.is_(None)).order_by(ProductEvent.id).limit(batch_size)
+            )
+            events = result.scalars().all()
+            if not events:
+                await db.rollback()
+                return 0
+
+            last = await db.scalar(select(func.max(ProductEvent.sequence))) or 0
+            now = datetime.now(timezone.utc)
+            for offset, event in enumerate(events, 1):
+                event.sequence = last + offset
+                event.published_at = now
+            # Sink first, then commit: a failed commit means a resend, never a lost event
+            await sink.publish([_message(event) for event in events])
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            outbox_relay_failures.inc()
+            raise
+
+        outbox_events_published.inc(len(events))
+        outbox_relay_lag.set((now - _utc(events[0].created_at)).total_seconds())
+        return len(events)
+
+    # Published events after sequence `after`, oldest first
+    # Returns (events, has_more); raises ChangesExpired if `after` was pruned away
+    @staticmethod
+    async def changes(db: AsyncSession, after: Optional[int], limit: int):
+        query = select(ProductEvent).where(ProductEvent.sequence.is_not(None))
+        if after is not None:
+            oldest = await db.scalar(select(func.min(ProductEvent.sequence)))
+            if oldest is not None and after < oldest - 1:
+                raise ChangesExpired(f"Changes before sequence {oldest} are no longer retained")
+            query = query.where(ProductEvent.sequence > after)
+        result = await db.execute(query.order_by(ProductEvent.sequence).limit(limit + 1))
+        events = result.scalars().all()
+        return events[:limit], len(events) > limit
+
+    # Product ids touched by events published after sequence `after`, oldest first
+    # Returns (product_ids, last sequence read); at most `limit` events per call
+    @staticmethod
+    async def changed_ids(db: AsyncSession, after: int, limit: int) -> Tuple[List[int], int]:
+        result = await db.execute(
+            select(ProductEvent.sequence, ProductEvent.product_id)
+            .where(ProductEvent.sequence > after)
+            .order_by(ProductEvent.sequence)
+            .limit(limit)
+        )
+        rows = result.all()
+        return [row.product_id for row in rows], rows[-1].sequence if rows else after
+
+    # Newest published sequence, 0 before anything was published
+    @staticmethod
+    async def latest_sequence(db: AsyncSession) -> int:
+        return await db.scalar(select(func.max(ProductEvent.sequence))) or 0
+
+    # Delete events published before `before`
+    # The newest event is always kept so sequences continue from it
+    @staticmethod
+    async def prune(db: AsyncSession, before: datetime):
+        newest = await db.scalar(select(func.max(ProductEvent.sequence)))
+        if newest is None:
+            return 0
+        result = await db.execute(
+            delete(ProductEvent).where(ProductEvent.published_at < before, ProductEvent.sequence < newest)
+        )
+        await db.commit()
+        return result.rowcount
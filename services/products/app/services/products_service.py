@@ -1,8 +1,172 @@
-from sqlalchemy import select
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import Float, Integer, and_, any_, bindparam, case, cast, func, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.product_model import Product
+from app.core.cache import ReadThroughCache, build_cache_backend
+from app.core.search import NAME_PREFIX_BOOST, SKU_PREFIX_BOOST, InvertedIndex, like_prefix
+from app.models.product_model import SEARCH_CONFIG, Product, search_document
+from app.schemas.products_schema import ProductCreate
+from app.services.product_events_service import ProductEventsService, record_events
 
 
+# Read-through cache for single product lookups, keyed by product id
+product_cache = ReadThroughCache("products", build_cache_backend("products"))
+
+
+class CacheSync:
+    """
+    Keeps a per-process cache coherent with writes made by other workers and
+    replicas. A write only invalidates its own process's cache, so every
+    process tails the published change events and drops the ids they touch.
+    """
+
+    def __init__(self, cache: ReadThroughCache):
+        self.cache = cache
+        self.after: Optional[int] = None
+
+    async def poll(self, db: AsyncSession, batch_size: int) -> int:
+        """Invalidate ids changed since the last poll; returns the number of events read."""
+        if self.after is None:
+            # First poll (at startup): nothing cached yet, so start from the newest event
+            self.after = await ProductEventsService.latest_sequence(db)
+            return 0
+        seen = 0
+        while True:
+            product_ids, self.after = await ProductEventsService.changed_ids(db, self.after, batch_size)
+            for product_id in set(product_ids):
+                await self.cache.invalidate(str(product_id))
+            seen += len(product_ids)
+            if len(product_ids) < batch_size:
+                return seen
+
+
+product_cache_sync = CacheSync(product_cache)
+
+# Search fallback for databases without full-text search (SQLite)
+search_index = InvertedIndex()
+
+
+# Columns overwritten when a bulk upsert hits an existing sku
+UPSERT_COLUMNS = ("name", "description", "price", "stock", "is_active")
+
+
+def _to_cache(product: Product) -> dict:
+    return {column.key: getattr(product, column.key) for column in Product.__table__.columns}
+
+
+def _ids_filter(db: AsyncSession, ids: List[int]):
+    # Postgres: one "id = ANY($1)" statement whatever the list length, so the
+    # prepared statement is reused; elsewhere fall back to an IN list
+    if db.get_bind().dialect.name == "postgresql":
+        return Product.id == any_(bindparam("ids", ids, type_=postgresql.ARRAY(Integer)))
+    return Product.id.in_(ids)
+
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors())
+
+
+class _BulkReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.received = 0
+        self.upserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, index: int, sku: Optional[str], error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"index": index, "sku": sku, "error": error})
+
+    def as_dict(self) -> dict:
+        return {"received": self.received, "upserted": self.upserted, "failed": self.failed, "errors": self.errors}
+
+
+async def _search_postgres(db: AsyncSession, q: str, limit: int, after, is_active):
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    sku_match = Product.sku.ilike(like_prefix(q), escape="\\")
+    name_match = Product.name.ilike(like_prefix(q), escape="\\")
+    rank = (
+        cast(func.ts_rank_cd(search_document, query), Float)
+        + case((sku_match, SKU_PREFIX_BOOST), else_=0.0)
+        + case((name_match, NAME_PREFIX_BOOST), else_=0.0)
+    )
+    ranked = rank.label("rank")
+    stmt = select(Product, ranked).where(or_(search_document.op("@@")(query), sku_match, name_match))
+    if is_active is not None:
+        stmt = stmt.where(Product.is_active == is_active)
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(rank < after_rank, and_(rank == after_rank, Product.id > after_id)))
+    result = await db.execute(stmt.order_by(ranked.desc(), Product.id).limit(limit + 1))
+    return [(product, product_rank) for product, product_rank in result.all()]
+
+
+async def _search_memory(db: AsyncSession, q: str, limit: int, after, is_active):
+    if not search_index.loaded:
+        result = await db.execute(select(Product.id, Product.sku, Product.name, Product.description))
+        search_index.load(result.all())
+    ranked = search_index.search(q)
+    if after is not None:
+        after_rank, after_id = after
+        ranked = [hit for hit in ranked if hit[0] < after_rank or (hit[0] == after_rank and hit[1] > after_id)]
+
+    # Fetch rows a page at a time, in rank order, until the page (+1) is full
+    hits = []
+    for start in range(0, len(ranked), limit + 1):
+        window = ranked[start:start + limit + 1]
+        query = select(Product).where(_ids_filter(db, [product_id for _, product_id in window]))
+        if is_active is not None:
+            query = query.where(Product.is_active == is_active)
+        rows = {product.id: product for product in (await db.execute(query)).scalars().all()}
+        hits.extend((rows[product_id], rank) for rank, product_id in window if product_id in rows)
+        if len(hits) > limit:
+            break
+    return hits[:limit + 1]
+
+
+class StockError(Exception):
+    def __init__(self, message: str, skus: List[str]):
+        super().__init__(f"{message}: {', '.join(skus)}")
+        self.skus = skus
+
+
+class UnknownSkus(StockError):
+    pass
+
+
+class InsufficientStock(StockError):
+    pass
+
+
+def _stock_quantities(items: Iterable[Tuple[str, int]]) -> List[Tuple[str, int]]:
+    # Repeated skus are summed, and rows are always updated (and so locked) in
+    # sku order: two overlapping baskets can never wait on each other's locks
+    totals: Dict[str, int] = {}
+    for sku, quantity in items:
+        totals[sku] = totals.get(sku, 0) + quantity
+    return sorted(totals.items())
+
+
+async def _stock_failure(db: AsyncSession, quantities: List[Tuple[str, int]], failed_sku: str) -> StockError:
+    # Called after rollback to explain the failure; a plain read, takes no locks
+    result = await db.execute(select(Product.sku, Product.stock).where(Product.sku.in_([sku for sku, _ in quantities])))
+    stock = dict(result.all())
+    unknown = [sku for sku, _ in quantities if sku not in stock]
+    if unknown:
+        return UnknownSkus("Unknown sku", unknown)
+    short = [sku for sku, quantity in quantities if (stock[sku] or 0) < quantity]
+    return InsufficientStock("Insufficient stock", short or [failed_sku])
+
+
+class VersionConflict(Exception):
+    def __init__(self, current_version: int):
+        super().__init__(f"Product was modified by another request (now at version {current_version})")
+        self.current_version = current_version
+
 
 class ProductsService:
 
@@ -13,30 +177,264 @@ class ProductsService:
     async def list(db: AsyncSession):
         result = await db.execute(select(Product))
         return result.scalars().all()
+
+    # Get one keyset page of products, ordered by id
+    # Returns (items, has_more); fetches limit + 1 rows to detect a next page
+    @staticmethod
+    async def list_page(
+        db: AsyncSession,
+        limit: int,
+        after_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sku_prefix: Optional[str] = None,
+    ):
+        query = select(Product)
+        if after_id is not None:
+            query = query.where(Product.id > after_id)
+        if is_active is not None:
+            query = query.where(Product.is_active == is_active)
+        if min_price is not None:
+            query = query.where(Product.price >= min_price)
+        if max_price is not None:
+            query = query.where(Product.price <= max_price)
+        if sku_prefix:
+            query = query.where(Product.sku.startswith(sku_prefix, autoescape=True))
+        query = query.order_by(Product.id).limit(limit + 1)
+
+        result = await db.execute(query)
+        rows = result.scalars().all()
+        return rows[:limit], len(rows) > limit
     
+    # Stream all products in id order through a server-side cursor
+    # Yields lists of at most chunk_size rows
+    @staticmethod
+    async def stream(db: AsyncSession, chunk_size: int):
+        result = await db.stream_scalars(
+            select(Product).order_by(Product.id).execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
+    # Ranked search over name/description, plus sku and name prefixes
+    # Postgres uses the tsvector/trigram indexes, other databases the in-memory index
+    # Returns ([(product, rank)], has_more), ordered by rank desc then id
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        q: str,
+        limit: int,
+        after: Optional[Tuple[float, int]] = None,
+        is_active: Optional[bool] = None,
+    ):
+        if db.get_bind().dialect.name == "postgresql":
+            hits = await _search_postgres(db, q, limit, after, is_active)
+        else:
+            hits = await _search_memory(db, q, limit, after, is_active)
+        return hits[:limit], len(hits) > limit
+
     # Create a new product
     @staticmethod
     async def create(db: AsyncSession, data):
         product = Product(**data)
         db.add(product)
+        await db.flush()
+        await record_events(db, [("created", _to_cache(product))])
         await db.commit()
         await db.refresh(product)
+        await product_cache.invalidate(str(product.id))
+        search_index.add(product.id, product.sku, product.name, product.description)
         return product
     
-    # Get a product by ID
+    # Insert or update many products by sku in one statement, plus their change events
+    # Returns the ids of the affected rows
+    @staticmethod
+    async def bulk_upsert(db: AsyncSession, rows: List[dict]):
+        if not rows:
+            return []
+        dialect = db.get_bind().dialect.name
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(Product).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.sku],
+            set_={**{column: stmt.excluded[column] for column in UPSERT_COLUMNS}, "version": Product.version + 1},
+        ).returning(*Product.__table__.columns)
+
+        result = await db.execute(stmt)
+        changed = [dict(row._mapping) for row in result.all()]
+        # A fresh insert is still at version 1; a conflict update bumped it
+        await record_events(db, [("created" if row["version"] == 1 else "updated", row) for row in changed])
+        await db.commit()
+        ids = [row["id"] for row in changed]
+        for product_id in ids:
+            await product_cache.invalidate(str(product_id))
+        search_index.reset()
+        return ids
+
+    # Validate and upsert a stream of raw items in batches, reporting per-row errors
+    # Items that failed to decode upstream arrive as ValueError instances
+    @staticmethod
+    async def bulk_ingest(db: AsyncSession, items: AsyncIterator[Any], batch_size: int, max_errors: int):
+        report = _BulkReport(max_errors)
+        batch: List[Tuple[int, dict]] = []
+
+        async def flush():
+            # Within one statement a sku may appear only once: the last row wins
+            latest = {}
+            for index, row in batch:
+                if row["sku"] in latest:
+                    report.fail(latest[row["sku"]][0], row["sku"], f"Duplicate sku, superseded by row {index}")
+                latest[row["sku"]] = (index, row)
+            rows = list(latest.values())
+            batch.clear()
+            try:
+                report.upserted += len(await ProductsService.bulk_upsert(db, [row for _, row in rows]))
+                return
+            except SQLAlchemyError:
+                await db.rollback()
+            # The batch failed as a whole: retry row by row to find the bad ones
+            for index, row in rows:
+                try:
+                    report.upserted += len(await ProductsService.bulk_upsert(db, [row]))
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    report.fail(index, row["sku"], str(getattr(e, "orig", e)))
+
+        async for item in items:
+            index = report.received
+            report.received += 1
+            if isinstance(item, ValueError):
+                report.fail(index, None, str(item))
+                continue
+            try:
+                row = ProductCreate.model_validate(item).model_dump()
+            except ValidationError as e:
+                sku = item.get("sku") if isinstance(item, dict) else None
+                report.fail(index, sku if isinstance(sku, str) else None, _validation_message(e))
+                continue
+            batch.append((index, row))
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+        return report.as_dict()
+
+    # Atomically take stock for a basket of (sku, quantity) pairs, all or nothing
+    # One conditional UPDATE per sku, so concurrent reservations can never oversell
+    # Returns {sku: remaining stock}; raises UnknownSkus / InsufficientStock
+    @staticmethod
+    async def reserve_stock(db: AsyncSession, items: Iterable[Tuple[str, int]]):
+        quantities = _stock_quantities(items)
+        remaining = {}
+        changed = []
+        for sku, quantity in quantities:
+            result = await db.execute(
+                update(Product)
+                .where(Product.sku == sku, Product.stock >= quantity)
+                .values(stock=Product.stock - quantity, version=Product.version + 1)
+                .returning(*Product.__table__.columns)
+            )
+            row = result.first()
+            if row is None:
+                await db.rollback()
+                raise await _stock_failure(db, quantities, sku)
+            changed.append(dict(row._mapping))
+            remaining[sku] = row.stock
+        await record_events(db, [("updated", row) for row in changed])
+        await db.commit()
+        for row in changed:
+            await product_cache.invalidate(str(row["id"]))
+        return remaining
+
+    # Return previously reserved stock for a basket of (sku, quantity) pairs
+    # Returns {sku: stock after release}; raises UnknownSkus
+    @staticmethod
+    async def release_stock(db: AsyncSession, items: Iterable[Tuple[str, int]]):
+        quantities = _stock_quantities(items)
+        remaining = {}
+        changed = []
+        for sku, quantity in quantities:
+            result = await db.execute(
+                update(Product)
+                .where(Product.sku == sku)
+                .values(stock=Product.stock + quantity, version=Product.version + 1)
+                .returning(*Product.__table__.columns)
+            )
+            row = result.first()
+            if row is None:
+                await db.rollback()
+                raise UnknownSkus("Unknown sku", [sku])
+            changed.append(dict(row._mapping))
+            remaining[sku] = row.stock
+        await record_events(db, [("updated", row) for row in changed])
+        await db.commit()
+        for row in changed:
+            await product_cache.invalidate(str(row["id"]))
+        return remaining
+
+    # Write only the supplied columns in one UPDATE ... RETURNING, bumping version
+    # With expected_version the row must still be at that version (optimistic locking)
+    # Returns the updated product, None if it doesn't exist; raises VersionConflict
+    @staticmethod
+    async def update(db: AsyncSession, product_id: int, changes: dict, expected_version: Optional[int] = None):
+        stmt = update(Product).where(Product.id == product_id)
+        if expected_version is not None:
+            stmt = stmt.where(Product.version == expected_version)
+        result = await db.execute(
+            stmt.values(**changes, version=Product.version + 1)
+            .returning(Product)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        product = result.scalars().first()
+        if product is None:
+            await db.rollback()
+            # Only on failure: tell a missing row from one another write got to first
+            current = await db.scalar(select(Product.version).where(Product.id == product_id))
+            if current is None:
+                return None
+            raise VersionConflict(current)
+        await record_events(db, [("updated", _to_cache(product))])
+        await db.commit()
+        await product_cache.invalidate(str(product_id))
+        if "name" in changes or "description" in changes:
+            search_index.add(product.id, product.sku, product.name, product.description)
+        return product
+
+    # Get a product by ID (read-through cache)
+    # Cache hits return a detached Product built from the cached columns
     @staticmethod
     async def get(db: AsyncSession, product_id: int):
-        result = await db.execute(select(Product).filter(Product.id == product_id))
-        return result.scalars().first()
+        async def load():
+            result = await db.execute(select(Product).filter(Product.id == product_id))
+            product = result.scalars().first()
+            return _to_cache(product) if product else None
+
+        data = await product_cache.get_or_load(str(product_id), load)
+        return Product(**data) if data is not None else None
     
+    # Get many products by ID in one query (through the cache)
+    # Returns {id: Product} for the ids that exist
+    @staticmethod
+    async def get_many(db: AsyncSession, product_ids: List[int]):
+        async def load(keys: List[str]):
+            result = await db.execute(select(Product).where(_ids_filter(db, [int(key) for key in keys])))
+            return {str(product.id): _to_cache(product) for product in result.scalars().all()}
+
+        found = await product_cache.get_many_or_load([str(product_id) for product_id in product_ids], load)
+        return {int(key): Product(**data) for key, data in found.items()}
+
     # Delete a product by ID
     @staticmethod
     async def delete(db: AsyncSession, product_id: int):
         result = await db.execute(select(Product).filter(Product.id == product_id))
         product = result.scalars().first()
         if product:
+            await record_events(db, [("deleted", _to_cache(product))])
             await db.delete(product)
             await db.commit()
+            await product_cache.invalidate(str(product_id))
+            search_index.remove(product_id)
             return product
         return None
     
@@ -0,0 +1,76 @@
+"""
+Product ingestion throughput: one create() per row (add + commit + refresh)
+against the batched INSERT ... ON CONFLICT path behind POST /api/products/bulk.
+
+Runs against a throwaway SQLite file by default; point BENCH_DATABASE_URL at
+a scratch Postgres database to measure the real thing.
+
+    cd services/products && python -m benchmarks.bench_bulk_upsert [rows]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.session import Base
+from app.services.products_service import ProductsService
+
+
+def make_rows(count: int, generation: int):
+    for i in range(count):
+        yield {"sku": f"BENCH-{i:08d}", "name": f"Product {i}", "description": None,
+               "price": 10.0 + generation, "stock": i % 100, "is_active": True}
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def main(rows: int):
+    url = os.environ.get("BENCH_DATABASE_URL")
+    tmpdir = None
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    print(f"{'path':<34}{'rows':>8}{'seconds':>10}{'rows/s':>12}")
+
+    # Per-row create is slow; sample a slice and extrapolate the rate
+    sample = min(rows, 2000)
+    async with sessions() as db:
+        start = time.perf_counter()
+        for row in make_rows(sample, 0):
+            await ProductsService.create(db, row)
+        elapsed = time.perf_counter() - start
+    print(f"{'create() per row':<34}{sample:>8}{elapsed:>10.2f}{sample / elapsed:>12.0f}")
+
+    for generation, label in ((1, "bulk insert (new skus)"), (2, "bulk upsert (existing skus)")):
+        async with sessions() as db:
+            if generation == 1:
+                await db.run_sync(lambda s: s.execute(Base.metadata.tables["products"].delete()))
+                await db.commit()
+            start = time.perf_counter()
+            report = await ProductsService.bulk_ingest(
+                db, _aiter(make_rows(rows, generation)), settings.BULK_BATCH_SIZE, settings.BULK_MAX_ERRORS
+            )
+            elapsed = time.perf_counter() - start
+        assert report["failed"] == 0, report["errors"][:5]
+        print(f"{label:<34}{rows:>8}{elapsed:>10.2f}{rows / elapsed:>12.0f}")
+
+    await engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000))
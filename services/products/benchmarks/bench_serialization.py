@@ -0,0 +1,85 @@
+"""
+Response serialization cost for a list of ORM products, per strategy:
+FastAPI's default response_model path (validate from attributes, dump to
+JSON-able python, stdlib json), the same with orjson, pydantic's own
+dump_json, and the trusted path behind SKIP_RESPONSE_VALIDATION
+(dump_orm + orjson, no validation).
+
+No database needed: rows are transient Product instances.
+
+    cd services/products && python -m benchmarks.bench_serialization [items] [repeats]
+"""
+import json
+import sys
+import time
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.core.responses import dump_orm
+from app.models.product_model import Product
+from app.schemas.products_schema import ProductRead
+
+products_adapter = TypeAdapter(List[ProductRead])
+
+
+def make_rows(count: int) -> List[Product]:
+    return [
+        Product(id=i, sku=f"SKU-{i:08d}", name=f"Product {i}", description="A perfectly ordinary product " * 3,
+                price=10.0 + i / 100, stock=i % 250, is_active=i % 7 != 0)
+        for i in range(1, count + 1)
+    ]
+
+
+def fastapi_default(rows) -> bytes:
+    # What a response_model route does today: validate, serialize, stdlib json
+    content = products_adapter.dump_python(products_adapter.validate_python(rows, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def validated_orjson(rows) -> bytes:
+    content = products_adapter.dump_python(products_adapter.validate_python(rows, from_attributes=True), mode="json")
+    return orjson.dumps(content)
+
+
+def validated_pydantic_json(rows) -> bytes:
+    return products_adapter.dump_json(products_adapter.validate_python(rows, from_attributes=True))
+
+
+def trusted_orjson(rows) -> bytes:
+    return orjson.dumps([dump_orm(row, ProductRead) for row in rows])
+
+
+STRATEGIES = [
+    ("response_model + json (default)", fastapi_default),
+    ("response_model + orjson", validated_orjson),
+    ("validate + pydantic dump_json", validated_pydantic_json),
+    ("trusted dump_orm + orjson", trusted_orjson),
+]
+
+
+def main(items: int, repeats: int):
+    rows = make_rows(items)
+    reference = json.loads(fastapi_default(rows))
+    print(f"{'strategy':<34}{'items':>8}{'best ms':>10}{'us/item':>10}{'KiB':>8}{'speedup':>9}")
+    baseline = None
+    for label, serialize in STRATEGIES:
+        body = serialize(rows)
+        assert json.loads(body) == reference, f"{label} produced different JSON"
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            serialize(rows)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{label:<34}{items:>8}{best * 1000:>10.1f}{best / items * 1e6:>10.2f}"
+              f"{len(body) / 1024:>8.0f}{baseline / best:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+    )
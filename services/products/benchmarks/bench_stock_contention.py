@@ -0,0 +1,97 @@
+"""
+Stock reservation under contention: many concurrent clients reserve random
+baskets from a small set of hot skus through ProductsService.reserve_stock,
+each on its own connection. Reports throughput, latency and rejections, and
+checks that no stock was oversold or lost.
+
+Runs against a throwaway SQLite file by default (writes serialize on the
+database lock there); point BENCH_DATABASE_URL at a scratch Postgres database
+to measure real row-lock contention.
+
+    cd services/products && python -m benchmarks.bench_stock_contention [clients] [reservations_per_client]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.session import Base
+from app.models.product_model import Product
+from app.services.products_service import InsufficientStock, ProductsService
+
+HOT_SKUS = 10
+INITIAL_STOCK = 1000
+
+
+async def client(sessions, reservations: int, rng: random.Random, stats: dict):
+    async with sessions() as db:
+        for _ in range(reservations):
+            basket = [(f"HOT-{rng.randrange(HOT_SKUS):02d}", rng.randint(1, 3)) for _ in range(rng.randint(1, 3))]
+            start = time.perf_counter()
+            try:
+                await ProductsService.reserve_stock(db, basket)
+            except InsufficientStock:
+                stats["rejected"] += 1
+            else:
+                stats["reserved"] += 1
+                for sku, quantity in basket:
+                    stats["taken"][sku] = stats["taken"].get(sku, 0) + quantity
+            stats["latencies"].append(time.perf_counter() - start)
+
+
+async def main(clients: int, reservations: int):
+    url = os.environ.get("BENCH_DATABASE_URL")
+    tmpdir = None
+    options = {"pool_size": clients, "max_overflow": 0}
+    if not url:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+        options = {"connect_args": {"timeout": 60}}
+    engine = create_async_engine(url, **options)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    sessions = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as db:
+        db.add_all(
+            Product(sku=f"HOT-{i:02d}", name=f"Hot product {i}", price=9.99, stock=INITIAL_STOCK)
+            for i in range(HOT_SKUS)
+        )
+        await db.commit()
+
+    stats = {"reserved": 0, "rejected": 0, "taken": {}, "latencies": []}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(sessions, reservations, random.Random(seed), stats) for seed in range(clients)
+    ))
+    elapsed = time.perf_counter() - start
+
+    async with sessions() as db:
+        stock = dict((await db.execute(select(Product.sku, Product.stock))).all())
+    oversold = [sku for sku, level in stock.items() if level < 0]
+    lost = [sku for sku, level in stock.items() if level != INITIAL_STOCK - stats["taken"].get(sku, 0)]
+
+    latencies = sorted(stats["latencies"])
+    total = len(latencies)
+    print(f"clients={clients} reservations={total} hot_skus={HOT_SKUS} seconds={elapsed:.2f}")
+    print(f"reserved={stats['reserved']} rejected={stats['rejected']} per_second={total / elapsed:.0f}")
+    print(f"p50={latencies[total // 2] * 1000:.2f}ms p99={latencies[int(total * 0.99)] * 1000:.2f}ms")
+    print(f"oversold={oversold or 'none'} inconsistent={lost or 'none'}")
+
+    await engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+    return 1 if oversold or lost else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )))
@@ -0,0 +1,50 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from app.core.cache import MemoryCache
+from app.db.session import Base, get_db
+from app.main import app
+from app.services.products_service import product_cache, search_index
+
+# Test database (in-memory SQLite through the async driver)
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest.fixture(autouse=True)
+def fresh_product_cache():
+    """Each test gets an empty cache so ids reused across databases don't leak"""
+    product_cache.backend = MemoryCache(max_entries=100, ttl_seconds=60)
+    yield product_cache.backend
+
+@pytest.fixture(autouse=True)
+def fresh_search_index():
+    """The in-memory search index is per process; reload it from each test database"""
+    search_index.reset()
+    yield search_index
+
+@pytest_asyncio.fixture(scope="function")
+async def db_engine():
+    """Create a fresh database for each test"""
+    engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+@pytest_asyncio.fixture(scope="function")
+async def db_session(db_engine):
+    session_factory = async_sessionmaker(bind=db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as session:
+        yield session
+
+@pytest_asyncio.fixture(scope="function")
+async def client(db_session):
+    """HTTP client against the app with get_db overridden"""
+    async def _override_get_db():
+        yield db_session
+    app.dependency_overrides[get_db] = _override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
@@ -0,0 +1,129 @@
+import asyncio
+import pytest
+from app.core.cache import MemoryCache, NullCache, ReadThroughCache
+from app.core.events import MemorySink
+from app.core.singleflight import SingleFlight
+from app.services import products_service
+from app.services.product_events_service import ProductEventsService
+from app.services.products_service import CacheSync, ProductsService
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2, ttl_seconds=60)
+    await cache.set("a", {"v": 1})
+    await cache.set("b", {"v": 2})
+    await cache.get("a")
+    await cache.set("c", {"v": 3})
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"v": 1}
+    assert len(cache) == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_cache_ttl_expiry():
+    cache = MemoryCache(max_entries=10, ttl_seconds=0)
+    await cache.set("a", {"v": 1})
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = ReadThroughCache("test", NullCache())
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*(cache.get_or_load("1", loader) for _ in range(10)))
+    assert calls == 1
+    assert results == [{"id": 1}] * 10
+
+
+@pytest.mark.asyncio
+async def test_loader_error_propagates_to_waiters():
+    cache = ReadThroughCache("test", NullCache())
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    results = await asyncio.gather(*(cache.get_or_load("1", loader) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_get_is_cached_and_delete_invalidates(db_session, fresh_product_cache):
+    product = await ProductsService.create(db_session, {"sku": "C-1", "name": "Cached", "price": 1.0, "stock": 1})
+    first = await ProductsService.get(db_session, product.id)
+    assert first.sku == "C-1"
+    assert await fresh_product_cache.get(str(product.id)) is not None
+
+    await ProductsService.delete(db_session, product.id)
+    assert await fresh_product_cache.get(str(product.id)) is None
+    assert await ProductsService.get(db_session, product.id) is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancellation():
+    flights = SingleFlight("test")
+    started = asyncio.Event()
+    calls = 0
+
+    async def slow():
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.05)
+        return calls
+
+    # A cancelled waiter leaves the leader and the other waiters alone
+    leader = asyncio.create_task(flights.do("k", slow))
+    await started.wait()
+    waiters = [asyncio.create_task(flights.do("k", slow)) for _ in range(2)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    assert await leader == 1
+    assert await waiters[1] == 1
+    assert waiters[0].cancelled()
+
+    # A cancelled leader hands the lookup to a waiter instead of failing it
+    started.clear()
+    leader = asyncio.create_task(flights.do("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(flights.do("k", slow))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert await waiter == 3
+    assert calls == 3
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_writes_in_another_worker_reach_this_cache(db_session, monkeypatch):
+    # Two workers: separate in-process caches over one database
+    this_worker = ReadThroughCache("products", MemoryCache(max_entries=100, ttl_seconds=60))
+    other_worker = ReadThroughCache("products", MemoryCache(max_entries=100, ttl_seconds=60))
+    sync = CacheSync(this_worker)
+    await sync.poll(db_session, batch_size=2)
+
+    monkeypatch.setattr(products_service, "product_cache", this_worker)
+    product = await ProductsService.create(db_session, {"sku": "W-1", "name": "Shared", "price": 1.0, "stock": 5})
+    assert (await ProductsService.get(db_session, product.id)).version == 1
+
+    # PATCH and a reservation served by the other worker
+    monkeypatch.setattr(products_service, "product_cache", other_worker)
+    await ProductsService.update(db_session, product.id, {"price": 2.0}, expected_version=1)
+    await ProductsService.reserve_stock(db_session, [("W-1", 2)])
+    await ProductEventsService.relay(db_session, MemorySink(), batch_size=500)
+
+    monkeypatch.setattr(products_service, "product_cache", this_worker)
+    assert (await ProductsService.get(db_session, product.id)).version == 1
+    # Once this worker's sync has seen the published events it serves the new row
+    assert await sync.poll(db_session, batch_size=2) == 3
+    fresh = await ProductsService.get(db_session, product.id)
+    assert (fresh.version, fresh.price, fresh.stock) == (3, 2.0, 3)
+    assert await sync.poll(db_session, batch_size=2) == 0
@@ -0,0 +1,90 @@
+import gzip
+import zlib
+import pytest
+from app.core.compression import CompressionMiddleware, negotiate
+from app.services.products_service import ProductsService
+
+
+def _app(chunks, content_type="application/json", extra_headers=(), status=200):
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type.encode()), *extra_headers]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return CompressionMiddleware(app, minimum_size=100)
+
+
+async def _raw_get(app, accept="gzip", if_none_match=None):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"accept-encoding", accept.encode())]
+    if if_none_match:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    await app(scope, receive, send)
+    headers = {k.decode(): v.decode() for k, v in sent[0]["headers"]}
+    return sent[0]["status"], headers, [m["body"] for m in sent[1:]]
+
+
+def test_negotiate_respects_q_values():
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate("br;q=0, gzip;q=0") is None
+    assert negotiate("*") == "br"
+    assert negotiate("identity") is None
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_compressed_and_small_ones_are_not():
+    body = b'{"items": [' + b'{"name": "x"},' * 200 + b"]}"
+    status, headers, chunks = await _raw_get(_app([body], extra_headers=[(b"etag", b'"1-1"')]))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert headers["etag"] == 'W/"1-1"'
+    assert int(headers["content-length"]) == len(chunks[0]) < len(body)
+    assert gzip.decompress(chunks[0]) == body
+
+    # Revalidating the compressed copy gets its weak tag back on the 304
+    _, headers, _ = await _raw_get(_app([b""], extra_headers=[(b"etag", b'"1-1"')], status=304), if_none_match='W/"1-1"')
+    assert headers["etag"] == 'W/"1-1"'
+
+    _, headers, chunks = await _raw_get(_app([b'{"ok": true}']))
+    assert "content-encoding" not in headers
+    assert chunks == [b'{"ok": true}']
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_are_flushed_as_they_go():
+    lines = [b'{"id": %d}\n' % i for i in range(5)]
+    _, headers, chunks = await _raw_get(_app(lines, content_type="application/x-ndjson"))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every chunk decodes on arrival, before the stream is finished
+    assert [decoder.decompress(chunk) for chunk in chunks] == lines
+
+
+@pytest.mark.asyncio
+async def test_precompressed_and_binary_content_pass_through():
+    blob = b"\x1f\x8b" + b"\x00" * 500
+    _, headers, chunks = await _raw_get(_app([blob], extra_headers=[(b"content-encoding", b"gzip")]))
+    assert headers["content-encoding"] == "gzip" and chunks == [blob]
+    _, headers, chunks = await _raw_get(_app([blob], content_type="image/png"))
+    assert "content-encoding" not in headers and chunks == [blob]
+
+
+@pytest.mark.asyncio
+async def test_list_endpoint_is_compressed(client, db_session):
+    for i in range(30):
+        await ProductsService.create(db_session, {"sku": f"C-{i}", "name": f"Compressed {i}", "price": 1.0, "stock": 1})
+    response = await client.get("/api/products/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["items"]) == 30
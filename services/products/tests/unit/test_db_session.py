@@ -0,0 +1,72 @@
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.migrate import migrate
+from app.db.session import InstrumentedQueuePool, engine_options
+
+
+def test_sqlite_engine_skips_pool_options():
+    options = engine_options("sqlite+aiosqlite:///:memory:")
+    assert options["echo"] is False
+    assert "pool_size" not in options
+
+
+def test_postgres_engine_uses_instrumented_pool():
+    options = engine_options("postgresql+asyncpg://u:p@localhost/db")
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert options["pool_pre_ping"] is True
+    assert options["connect_args"]["prepared_statement_cache_size"] == 100
+    assert "server_settings" not in options["connect_args"]
+
+
+def test_importing_the_app_has_no_side_effects():
+    # Fresh interpreter: nothing else in the test session has touched the engine
+    code = (
+        "import sys, app.main, app.db.session as session;"
+        "assert session._engine is None;"
+        "assert 'apscheduler' not in sys.modules and 'asyncpg' not in sys.modules"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ""
+
+
+@pytest.mark.asyncio
+async def test_migrate_creates_the_schema():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        await migrate(engine)
+        async with engine.connect() as conn:
+            tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        assert "products" in tables
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_migrate_upgrades_existing_tables():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        # A products table from before the version column, with a row in it
+        async with engine.begin() as conn:
+            await conn.execute(text(
+                "CREATE TABLE products (id INTEGER PRIMARY KEY, sku VARCHAR(64) NOT NULL, name VARCHAR(255) NOT NULL,"
+                " description TEXT, price FLOAT NOT NULL, stock INTEGER, is_active BOOLEAN NOT NULL)"
+            ))
+            await conn.execute(text("INSERT INTO products VALUES (1, 'OLD-1', 'Old', NULL, 1.0, 1, 1)"))
+        await migrate(engine)
+        # Idempotent: a second run finds nothing to add
+        await migrate(engine)
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT version FROM products"))).scalar_one() == 1
+            indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("products"))
+        # Indexes declared after the table existed are created too (the Postgres-only ones aren't)
+        names = {index["name"] for index in indexes}
+        assert {"ix_products_is_active_id", "ix_products_price_id", "ix_products_sku"} <= names
+        assert "ix_products_search" not in names
+    finally:
+        await engine.dispose()
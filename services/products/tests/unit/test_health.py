@@ -0,0 +1,78 @@
+import pytest
+from app.core import health
+from app.core.config import settings
+from app.core.health import health_monitor
+
+
+@pytest.fixture
+def monitor(monkeypatch, db_engine):
+    """The app's monitor with empty results, checking the test database"""
+    monkeypatch.setattr(health_monitor, "checks", dict(health_monitor.checks))
+    monkeypatch.setattr(health_monitor, "results", {})
+    monkeypatch.setattr(health, "get_engine", lambda: db_engine)
+    yield health_monitor
+
+
+@pytest.mark.asyncio
+async def test_probes_answer_from_cached_state(client, monitor):
+    calls = []
+
+    async def counted_check():
+        calls.append(1)
+        await health.check_database()
+    monitor.register("database", counted_check)
+
+    # Nothing checked yet: alive, but not ready for traffic
+    assert (await client.get("/live")).status_code == 200
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["dependencies"]["database"]["status"] == "unknown"
+
+    await monitor.refresh()
+    for path in ("/ready", "/health", "/ready"):
+        response = await client.get(path)
+        assert response.status_code == 200
+        assert response.json()["status"] == "OK"
+        assert response.json()["database"] == "connected"
+    # Three probes, one database check
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_failures_and_stale_results_fail_readiness(client, monitor, monkeypatch):
+    async def down():
+        raise ConnectionError("connection refused")
+
+    monitor.register("cache", down, critical=False)
+    await monitor.refresh()
+    response = await client.get("/ready")
+    # Non-critical dependencies are reported without gating readiness
+    assert response.status_code == 200
+    cache = response.json()["dependencies"]["cache"]
+    assert cache["status"] == "down" and cache["error"] == "ConnectionError: connection refused"
+
+    monitor.register("database", down)
+    await monitor.refresh()
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["database"] == "disconnected"
+    assert (await client.get("/live")).status_code == 200
+
+    monitor.register("database", health.check_database)
+    await monitor.refresh()
+    monkeypatch.setattr(settings, "HEALTH_STALE_AFTER_SECONDS", -1)
+    response = await client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["dependencies"]["database"]["status"] == "stale"
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_fails_readiness(client, monitor, monkeypatch):
+    await monitor.refresh()
+    monkeypatch.setattr(health, "pool_status", lambda: {"in_use": 15, "capacity": 15, "saturation": 1.0})
+    response = await client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["pool"]["saturation"] == 1.0
+
+    monkeypatch.setattr(settings, "HEALTH_POOL_SATURATION_MAX", 0.9)
+    assert (await client.get("/ready")).status_code == 503
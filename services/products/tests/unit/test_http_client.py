@@ -0,0 +1,153 @@
+import asyncio
+
+import httpx
+import pytest
+from app.core import http_client
+from app.core.config import settings
+from app.core.http_client import CircuitBreaker, CircuitOpen, ServiceClient
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(settings, "HTTP_CLIENT_BACKOFF_BASE_MS", 0.0)
+    monkeypatch.setattr(settings, "HTTP_CLIENT_RETRIES", 2)
+    monkeypatch.setattr(settings, "HTTP_CLIENT_BREAKER_FAILURES", 3)
+
+
+def _client(handler):
+    return ServiceClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_idempotent_requests_retry_transport_errors_and_5xx():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) == 1:
+            raise httpx.ConnectError("refused", request=request)
+        if len(calls) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"id": 7})
+
+    client = _client(handler)
+    response = await client.get("http://users:8001/api/users/7")
+    assert response.json() == {"id": 7}
+    assert calls == ["GET"] * 3
+
+    # POST is not retried: a second attempt could apply the write twice
+    calls.clear()
+    with pytest.raises(httpx.ConnectError):
+        await client.post("http://users:8001/api/users", json={})
+    assert calls == ["POST"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_after_consecutive_failures_and_recovers():
+    healthy = False
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.host)
+        return httpx.Response(200 if healthy else 500)
+
+    client = _client(handler)
+    # 500 is not retried, so three calls trip the breaker
+    for _ in range(3):
+        assert (await client.get("http://flaky:8080/x")).status_code == 500
+    with pytest.raises(CircuitOpen):
+        await client.get("http://flaky:8080/x")
+    assert len(calls) == 3
+    # Other hosts are unaffected
+    assert (await client.get("http://other:8080/x")).status_code == 500
+
+    # After the reset timeout one trial request goes through and closes it
+    breaker = client.breaker("flaky:8080")
+    breaker.opened_at -= settings.HTTP_CLIENT_BREAKER_RESET_SECONDS
+    healthy = True
+    assert (await client.get("http://flaky:8080/x")).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    await client.close()
+
+
+def test_half_open_allows_a_single_trial():
+    breaker = CircuitBreaker("h", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    # A failed trial re-opens the circuit
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_returns_first_answer():
+    calls = 0
+
+    async def slow_then_fast(request):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(5)
+            return httpx.Response(200, text="slow")
+        return httpx.Response(200, text="fast")
+
+    before = http_client.http_client_hedges.labels(host="hedged:8080")._value.get()
+    client = _client(slow_then_fast)
+    response = await asyncio.wait_for(client.get("http://hedged:8080/x", hedge_after_ms=10), timeout=2)
+    assert response.text == "fast"
+    assert http_client.http_client_hedges.labels(host="hedged:8080")._value.get() == before + 1
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_does_not_wedge_the_breaker():
+    hang = True
+    sent = []
+
+    async def handler(request):
+        sent.append(request.url.path)
+        if hang:
+            await asyncio.sleep(5)
+        return httpx.Response(200)
+
+    client = _client(handler)
+    breaker = client.breaker("stuck:8080")
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.opened_at -= settings.HTTP_CLIENT_BREAKER_RESET_SECONDS
+
+    # The half-open trial is cancelled by the caller's timeout: counted as a failure
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.get("http://stuck:8080/trial", hedge_after_ms=0), timeout=0.05)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # ... so the next reset window gets a fresh trial instead of CircuitOpen forever
+    breaker.opened_at -= settings.HTTP_CLIENT_BREAKER_RESET_SECONDS
+    hang = False
+    assert (await client.get("http://stuck:8080/again")).status_code == 200
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert sent == ["/trial", "/again"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_hedged_request_cancels_the_attempt():
+    cancelled = asyncio.Event()
+
+    async def handler(request):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return httpx.Response(200)
+
+    client = _client(handler)
+    # Cancelled while waiting for the first attempt, before any hedge is sent
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(client.get("http://hedge-cancel:8080/x", hedge_after_ms=1000), timeout=0.05)
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await client.close()
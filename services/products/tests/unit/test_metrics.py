@@ -0,0 +1,27 @@
+import pytest
+from app.core.metrics import endpoint_clicks, UNMATCHED_ROUTE
+from app.services.products_service import ProductsService
+
+
+def _clicks(endpoint):
+    return endpoint_clicks.labels(endpoint=endpoint)._value.get()
+
+
+@pytest.mark.asyncio
+async def test_metrics_labelled_by_route_template(client, db_session):
+    product = await ProductsService.create(db_session, {"sku": "M-1", "name": "Metric", "price": 1.0, "stock": 1})
+    template_before = _clicks("/api/products/{product_id}")
+    raw_before = _clicks(f"/api/products/{product.id}")
+
+    response = await client.get(f"/api/products/{product.id}")
+    assert response.status_code == 200
+    assert _clicks("/api/products/{product_id}") == template_before + 1
+    assert _clicks(f"/api/products/{product.id}") == raw_before
+
+
+@pytest.mark.asyncio
+async def test_unmatched_paths_share_one_series(client):
+    before = _clicks(UNMATCHED_ROUTE)
+    await client.get("/no/such/path/1")
+    await client.get("/no/such/path/2")
+    assert _clicks(UNMATCHED_ROUTE) == before + 2
@@ -0,0 +1,106 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.events import FileSink, MemorySink
+from app.core.pagination import encode_cursor
+from app.models.product_event_model import ProductEvent
+from app.services.product_events_service import ProductEventsService
+from app.services.products_service import InsufficientStock, ProductsService
+
+
+async def _event_types(db):
+    result = await db.execute(select(ProductEvent.event_type, ProductEvent.product_id).order_by(ProductEvent.id))
+    return result.all()
+
+
+@pytest.mark.asyncio
+async def test_writes_record_events_in_the_same_transaction(db_session):
+    product = await ProductsService.create(db_session, {"sku": "E-1", "name": "Evented", "price": 1.0, "stock": 2})
+    await ProductsService.update(db_session, product.id, {"price": 2.0})
+    await ProductsService.reserve_stock(db_session, [("E-1", 1)])
+    await ProductsService.bulk_upsert(db_session, [
+        {"sku": "E-1", "name": "Evented", "description": None, "price": 3.0, "stock": 1, "is_active": True},
+        {"sku": "E-2", "name": "Bulk", "description": None, "price": 1.0, "stock": 1, "is_active": True},
+    ])
+    await ProductsService.delete(db_session, product.id)
+    assert await _event_types(db_session) == [
+        ("created", 1), ("updated", 1), ("updated", 1), ("updated", 1), ("created", 2), ("deleted", 1),
+    ]
+
+    # A write that rolls back leaves no event behind
+    with pytest.raises(InsufficientStock):
+        await ProductsService.reserve_stock(db_session, [("E-2", 99)])
+    assert len(await _event_types(db_session)) == 6
+
+
+@pytest.mark.asyncio
+async def test_relay_publishes_in_order_and_feed_pages_by_cursor(client, db_session):
+    for i in range(3):
+        await ProductsService.create(db_session, {"sku": f"F-{i}", "name": f"Feed {i}", "price": 1.0, "stock": 1})
+
+    # Nothing is visible on the feed until the relay has published it
+    response = await client.get("/api/products/changes")
+    assert response.json()["items"] == []
+
+    sink = MemorySink()
+    assert await ProductEventsService.relay(db_session, sink, batch_size=2) == 3
+    assert [event["sequence"] for event in sink.events] == [1, 2, 3]
+    assert sink.events[0]["payload"]["sku"] == "F-0"
+    assert await ProductEventsService.relay(db_session, sink, batch_size=2) == 0
+
+    page = (await client.get("/api/products/changes", params={"limit": 2})).json()
+    assert [item["sequence"] for item in page["items"]] == [1, 2]
+    assert page["has_more"] is True
+    assert page["items"][0]["event_type"] == "created"
+    page = (await client.get("/api/products/changes", params={"since": page["next_cursor"]})).json()
+    assert [item["payload"]["name"] for item in page["items"]] == ["Feed 2"]
+
+    # Caught up: an empty page hands back the same position to poll from
+    caught_up = (await client.get("/api/products/changes", params={"since": page["next_cursor"]})).json()
+    assert caught_up == {"items": [], "next_cursor": page["next_cursor"], "has_more": False}
+
+    await ProductsService.update(db_session, 2, {"stock": 9})
+    await ProductEventsService.relay(db_session, sink, batch_size=10)
+    latest = (await client.get("/api/products/changes", params={"since": page["next_cursor"]})).json()
+    assert [(item["sequence"], item["payload"]["stock"]) for item in latest["items"]] == [(4, 9)]
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_is_retried(db_session):
+    await ProductsService.create(db_session, {"sku": "R-1", "name": "Retry", "price": 1.0, "stock": 1})
+
+    class BrokenSink(MemorySink):
+        async def publish(self, events):
+            raise ConnectionError("sink down")
+
+    with pytest.raises(ConnectionError):
+        await ProductEventsService.relay(db_session, BrokenSink(), batch_size=10)
+    assert await db_session.scalar(select(func.count()).where(ProductEvent.sequence.is_not(None))) == 0
+
+    sink = MemorySink()
+    assert await ProductEventsService.relay(db_session, sink, batch_size=10) == 1
+    assert sink.events[0]["sequence"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pruned_history_returns_410(client, db_session, tmp_path):
+    for i in range(3):
+        await ProductsService.create(db_session, {"sku": f"P-{i}", "name": f"Pruned {i}", "price": 1.0, "stock": 1})
+    sink = FileSink(str(tmp_path / "events.ndjson"))
+    await ProductEventsService.relay(db_session, sink, batch_size=10)
+    lines = (tmp_path / "events.ndjson").read_text().splitlines()
+    assert [json.loads(line)["sequence"] for line in lines] == [1, 2, 3]
+
+    # Everything is old enough, but the newest event survives so numbering continues
+    assert await ProductEventsService.prune(db_session, datetime.now(timezone.utc) + timedelta(hours=1)) == 2
+    start = (await client.get("/api/products/changes")).json()
+    assert [item["sequence"] for item in start["items"]] == [3]
+    assert (await client.get("/api/products/changes", params={"since": start["next_cursor"]})).json()["items"] == []
+
+    # Sequences 1-2 are gone: only a cursor at 2 or later can still continue
+    assert (await client.get("/api/products/changes", params={"since": encode_cursor(2)})).status_code == 200
+    response = await client.get("/api/products/changes", params={"since": encode_cursor(1)})
+    assert response.status_code == 410
@@ -0,0 +1,283 @@
+import json
+import pytest
+from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.services.products_service import InsufficientStock, ProductsService, UnknownSkus
+
+
+async def _seed(db, count=5):
+    for i in range(count):
+        await ProductsService.create(db, {
+            "sku": f"SKU-{i:03d}",
+            "name": f"Product {i}",
+            "price": 10.0 * (i + 1),
+            "stock": 5,
+            "is_active": i % 2 == 0,
+        })
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(42)) == 42
+    assert decode_cursor(None) is None
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_list_page_keyset(db_session):
+    await _seed(db_session)
+    items, has_more = await ProductsService.list_page(db_session, limit=2)
+    assert [p.sku for p in items] == ["SKU-000", "SKU-001"]
+    assert has_more
+
+    items, has_more = await ProductsService.list_page(db_session, limit=2, after_id=items[-1].id)
+    assert [p.sku for p in items] == ["SKU-002", "SKU-003"]
+
+    items, has_more = await ProductsService.list_page(db_session, limit=2, after_id=items[-1].id)
+    assert [p.sku for p in items] == ["SKU-004"]
+    assert not has_more
+
+
+@pytest.mark.asyncio
+async def test_list_page_filters(db_session):
+    await _seed(db_session)
+    items, _ = await ProductsService.list_page(db_session, limit=10, is_active=True, min_price=20, max_price=50)
+    assert [p.sku for p in items] == ["SKU-002", "SKU-004"]
+
+    items, _ = await ProductsService.list_page(db_session, limit=10, sku_prefix="SKU-00")
+    assert len(items) == 5
+    items, _ = await ProductsService.list_page(db_session, limit=10, sku_prefix="SKU_")
+    assert items == []
+
+
+@pytest.mark.asyncio
+async def test_list_products_endpoint(client, db_session):
+    await _seed(db_session, count=3)
+    response = await client.get("/api/products/", params={"limit": 2})
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["items"]) == 2
+    assert body["next_cursor"]
+
+    response = await client.get("/api/products/", params={"limit": 2, "cursor": body["next_cursor"]})
+    body = response.json()
+    assert [p["sku"] for p in body["items"]] == ["SKU-002"]
+    assert body["next_cursor"] is None
+
+    response = await client.get("/api/products/", params={"cursor": "garbage"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_stream_partitions(db_session):
+    await _seed(db_session, count=5)
+    partitions = [p async for p in ProductsService.stream(db_session, chunk_size=2)]
+    assert [len(p) for p in partitions] == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_export_products_ndjson(client, db_session):
+    await _seed(db_session, count=3)
+    response = await client.get("/api/products/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [p["sku"] for p in lines] == ["SKU-000", "SKU-001", "SKU-002"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_json_array(client, db_session):
+    await _seed(db_session, count=1)
+    rows = [
+        {"sku": "SKU-000", "name": "Renamed", "price": 1.5, "stock": 9},
+        {"sku": "NEW-1", "name": "New", "price": 2.0, "stock": 1},
+        {"sku": "BAD", "name": "No price", "stock": 1},
+        {"sku": "NEW-1", "name": "New again", "price": 3.0, "stock": 2},
+    ]
+    response = await client.post("/api/products/bulk", json=rows)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["received"], body["upserted"], body["failed"]) == (4, 2, 2)
+    assert {e["index"] for e in body["errors"]} == {1, 2}
+
+    items, _ = await ProductsService.list_page(db_session, limit=10)
+    by_sku = {p.sku: p for p in items}
+    assert by_sku["SKU-000"].name == "Renamed"
+    assert by_sku["NEW-1"].price == 3.0
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_ndjson_stream(client, db_session):
+    lines = [json.dumps({"sku": f"N-{i}", "name": "n", "price": 1.0, "stock": i}) for i in range(5)]
+    lines.insert(2, "{not json")
+    response = await client.post(
+        "/api/products/bulk",
+        content="\n".join(lines).encode(),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    body = response.json()
+    assert (body["received"], body["upserted"], body["failed"]) == (6, 5, 1)
+    assert body["errors"][0]["index"] == 2
+
+    response = await client.post("/api/products/bulk", json={"sku": "x"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_get_by_ids(client, db_session, fresh_product_cache):
+    await _seed(db_session, count=3)
+    await ProductsService.get(db_session, 2)  # warm one entry
+    response = await client.get("/api/products/", params={"ids": "3,99,1,2,3"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [p["id"] for p in body["items"]] == [3, 1, 2]
+    assert body["missing"] == [99]
+    assert len(fresh_product_cache) == 3
+
+    response = await client.get("/api/products/", params={"ids": "1,x"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_missing_product_returns_404(client):
+    assert (await client.get("/api/products/12345")).status_code == 404
+    assert (await client.delete("/api/products/12345")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_reserve_stock_is_all_or_nothing(db_session):
+    await _seed(db_session, count=2)
+    remaining = await ProductsService.reserve_stock(db_session, [("SKU-001", 2), ("SKU-000", 1), ("SKU-001", 1)])
+    assert remaining == {"SKU-000": 4, "SKU-001": 2}
+
+    with pytest.raises(InsufficientStock) as exc:
+        await ProductsService.reserve_stock(db_session, [("SKU-000", 1), ("SKU-001", 3)])
+    assert exc.value.skus == ["SKU-001"]
+    with pytest.raises(UnknownSkus):
+        await ProductsService.reserve_stock(db_session, [("SKU-000", 1), ("NOPE", 1)])
+    # Neither failed basket left a partial decrement behind
+    assert (await ProductsService.get(db_session, 1)).stock == 4
+
+    assert await ProductsService.release_stock(db_session, [("SKU-001", 2)]) == {"SKU-001": 4}
+
+
+@pytest.mark.asyncio
+async def test_stock_endpoints(client, db_session):
+    await _seed(db_session, count=1)
+    await ProductsService.get(db_session, 1)  # cached stock must not go stale
+
+    response = await client.post("/api/products/stock/reserve", json={"items": [{"sku": "SKU-000", "quantity": 5}]})
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"sku": "SKU-000", "stock": 0}]}
+    assert (await client.get("/api/products/1")).json()["stock"] == 0
+
+    response = await client.post("/api/products/stock/reserve", json={"items": [{"sku": "SKU-000", "quantity": 1}]})
+    assert response.status_code == 409
+    assert response.json()["message"] == "Insufficient stock: SKU-000"
+    response = await client.post("/api/products/stock/release", json={"items": [{"sku": "NOPE", "quantity": 1}]})
+    assert response.status_code == 404
+    response = await client.post("/api/products/stock/reserve", json={"items": [{"sku": "SKU-000", "quantity": 0}]})
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_search_ranking_and_pages(client, db_session):
+    for sku, name, description in [
+        ("LAP-001", "Laptop Pro", "Fast laptop with a great keyboard"),
+        ("KEY-001", "Mechanical keyboard", "Clicky keyboard keyboard"),
+        ("MOU-001", "Mouse", "Wireless mouse"),
+        ("LAP-002", "Laptop Air", "Light laptop"),
+    ]:
+        await ProductsService.create(db_session, {"sku": sku, "name": name, "description": description,
+                                                  "price": 10.0, "stock": 1})
+
+    response = await client.get("/api/products/search", params={"q": "keyboard"})
+    assert response.status_code == 200
+    assert [p["sku"] for p in response.json()["items"]] == ["KEY-001", "LAP-001"]
+
+    # Sku prefix hits outrank plain text hits; pages follow the ranked order
+    first = await client.get("/api/products/search", params={"q": "lap", "limit": 1})
+    body = first.json()
+    assert [p["sku"] for p in body["items"]] == ["LAP-001"]
+    second = await client.get("/api/products/search", params={"q": "lap", "limit": 1, "cursor": body["next_cursor"]})
+    assert [p["sku"] for p in second.json()["items"]] == ["LAP-002"]
+    assert second.json()["next_cursor"] is None
+
+    # Writes keep the in-memory index current
+    await ProductsService.delete(db_session, 2)
+    response = await client.get("/api/products/search", params={"q": "keyboard"})
+    assert [p["sku"] for p in response.json()["items"]] == ["LAP-001"]
+    assert (await client.get("/api/products/search", params={"q": "x", "cursor": "bad"})).status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_trusted_responses_match_validated(client, db_session, monkeypatch):
+    await _seed(db_session, count=3)
+    params = [{"limit": 2}, {"ids": "3,1,9"}, {"q": "product"}]
+    paths = ["/api/products/", "/api/products/", "/api/products/search"]
+
+    trusted = [(await client.get(path, params=p)).json() for path, p in zip(paths, params)]
+    monkeypatch.setattr(settings, "SKIP_RESPONSE_VALIDATION", False)
+    validated = [(await client.get(path, params=p)).json() for path, p in zip(paths, params)]
+    assert trusted == validated
+    assert [item["id"] for item in trusted[1]["items"]] == [3, 1]
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_returns_304_until_the_row_changes(client, db_session):
+    await _seed(db_session, count=2)
+    first = await client.get("/api/products/1")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == settings.HTTP_CACHE_CONTROL_DETAIL
+
+    cached = await client.get("/api/products/1", headers={"If-None-Match": f"W/{etag}, \"other\""})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == f"W/{etag}"
+
+    page = await client.get("/api/products/", params={"limit": 1})
+    assert (await client.get("/api/products/", params={"limit": 1},
+                             headers={"If-None-Match": page.headers["etag"]})).status_code == 304
+
+    # Any write bumps the row version, so both validators go stale
+    await client.post("/api/products/stock/reserve", json={"items": [{"sku": "SKU-000", "quantity": 1}]})
+    changed = await client.get("/api/products/1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["stock"] == 4
+    assert changed.headers["etag"] != etag
+    assert (await client.get("/api/products/", params={"limit": 1},
+                             headers={"If-None-Match": page.headers["etag"]})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_patch_writes_only_supplied_fields(client, db_session):
+    await _seed(db_session, count=1)
+    etag = (await client.get("/api/products/1")).headers["etag"]
+
+    response = await client.patch("/api/products/1", json={"price": 12.5, "description": None},
+                                  headers={"If-Match": etag})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["price"] == 12.5 and body["name"] == "Product 0" and body["stock"] == 5
+    assert response.headers["etag"] == '"1-2"'
+    # The cached copy was invalidated
+    assert (await client.get("/api/products/1")).json()["price"] == 12.5
+
+    assert (await client.patch("/api/products/1", json={})).status_code == 400
+    assert (await client.patch("/api/products/1", json={"name": None})).status_code == 400
+    assert (await client.patch("/api/products/1", json={"price": 1.0}, headers={"If-Match": '"2-1"'})).status_code == 400
+    assert (await client.patch("/api/products/99", json={"price": 1.0})).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_patch_with_stale_version_conflicts(client, db_session):
+    await _seed(db_session, count=1)
+    # Two clients read version 1; the first write wins, the second gets 409
+    assert (await client.patch("/api/products/1", json={"stock": 7, "version": 1})).status_code == 200
+    stale = await client.patch("/api/products/1", json={"stock": 3}, headers={"If-Match": 'W/"1-1"'})
+    assert stale.status_code == 409
+    assert "version 2" in stale.json()["message"]
+    assert (await client.get("/api/products/1")).json()["stock"] == 7
+
+    # Without a version the write is unconditional
+    assert (await client.patch("/api/products/1", json={"stock": 3})).json()["stock"] == 3
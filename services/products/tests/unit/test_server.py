@@ -0,0 +1,33 @@
+from app import server
+from app.core.config import settings
+
+
+def _cgroup(monkeypatch, files):
+    monkeypatch.setattr(server, "_read", files.get)
+
+
+def test_cgroup_cpu_limit_v2_and_v1(monkeypatch):
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu.max": "150000 100000"})
+    assert server.cgroup_cpu_limit() == 1.5
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu.max": "max 100000"})
+    assert server.cgroup_cpu_limit() is None
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "20000", "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000"})
+    assert server.cgroup_cpu_limit() == 0.2
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu/cpu.cfs_quota_us": "-1", "/sys/fs/cgroup/cpu/cpu.cfs_period_us": "100000"})
+    assert server.cgroup_cpu_limit() is None
+
+
+def test_worker_count_follows_quota_and_overrides(monkeypatch):
+    monkeypatch.setattr(server.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+    monkeypatch.setattr(settings, "SERVER_MAX_WORKERS", 8)
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 0)
+
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu.max": "20000 100000"})
+    assert server.worker_count() == 1
+    _cgroup(monkeypatch, {"/sys/fs/cgroup/cpu.max": "250000 100000"})
+    assert server.worker_count() == 3
+    _cgroup(monkeypatch, {})
+    assert server.worker_count() == 8
+
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 2)
+    assert server.worker_count() == 2
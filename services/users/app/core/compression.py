@@ -0,0 +1,169 @@
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Brotli is optional: without the package only gzip is offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Text-like payloads only; images, archives and anything else that is already
+# compressed gain nothing and would just burn CPU
+COMPRESSIBLE_TYPES = frozenset((
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+))
+NEVER_COMPRESS_TYPES = frozenset(("text/event-stream",))
+SKIP_STATUS = frozenset((204, 304))
+
+
+def is_compressible(content_type: str) -> bool:
+    mime = content_type.split(";", 1)[0].strip().lower()
+    if mime in NEVER_COMPRESS_TYPES:
+        return False
+    return (
+        mime in COMPRESSIBLE_TYPES
+        or mime.startswith("text/")
+        or mime.endswith("+json")
+        or mime.endswith("+xml")
+    )
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Preferred coding the client accepts: br (if available) over gzip, by q-value."""
+    offered = ("br", "gzip") if brotli is not None else ("gzip",)
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in offered:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Sync-flush each chunk so streamed responses reach the client as they go
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+# =============================
+# COMPRESSION MIDDLEWARE
+# =============================
+
+class CompressionMiddleware:
+    """
+    Pure ASGI gzip/brotli compression. Bodies under minimum_size are sent as
+    is; streamed bodies are compressed chunk by chunk. Responses that already
+    carry a Content-Encoding, or whose type isn't text-like, pass through.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder(self, coding: str):
+        if coding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request_headers = Headers(scope=scope)
+        coding = negotiate(request_headers.get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+        decided = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, decided
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                if start is not None:
+                    await send(start)
+                    start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not decided:
+                decided = True
+                headers = MutableHeaders(raw=start["headers"])
+                eligible = (
+                    start["status"] not in SKIP_STATUS
+                    and "content-encoding" not in headers
+                    and is_compressible(headers.get("content-type", ""))
+                )
+                if eligible:
+                    headers.add_vary_header("Accept-Encoding")
+                elif start["status"] == 304:
+                    # Revalidating a compressed copy: answer with the same weak tag
+                    etag = headers.get("etag")
+                    if etag and "W/" + etag in request_headers.get("if-none-match", ""):
+                        headers["ETag"] = "W/" + etag
+                if eligible and (more_body or len(body) >= self.minimum_size):
+                    encoder = self._encoder(coding)
+                    headers["Content-Encoding"] = coding
+                    if "content-length" in headers:
+                        del headers["Content-Length"]
+                    # The encoded bytes differ from the identity ones, so a
+                    # strong validator must not be reused as is
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["ETag"] = "W/" + etag
+                    body = encoder.compress(body, final=not more_body)
+                    if not more_body:
+                        headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            if encoder is not None:
+                message = {**message, "body": encoder.compress(body, final=not more_body)}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,202 @@
+import asyncio
+import csv
+import ipaddress
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Offline geo database: a flat file of fixed-size, non-overlapping records
+# sorted by start address, (start_ip, end_ip, latitude, longitude), IPv4 only.
+# The file is mmap'd so lookups are a binary search over pages the OS caches.
+RECORD = struct.Struct("<IIff")
+START = struct.Struct("<I")
+
+UNKNOWN = ("unknown", "unknown")
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+# Coordinates are bucketed to GEOIP_BUCKET_DEGREES, which bounds the number
+# of label pairs (648 at the default 10 degree grid) no matter the traffic
+user_locations = Counter(
+    'unique_user_locations',
+    'Requests per coarse user location bucket',
+    ['latitude', 'longitude']
+)
+
+geo_lookups_dropped = Counter(
+    'geoip_lookups_dropped',
+    'Geo lookups dropped because the enrichment queue was full'
+)
+
+
+# =============================
+# IP RANGE DATABASE
+# =============================
+
+class GeoIPDatabase:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0 or size % RECORD.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a geo range database")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = size // RECORD.size
+
+    def lookup(self, ip: str) -> Optional[Tuple[float, float]]:
+        try:
+            key = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            return None
+
+        # Find the last range whose start is <= key
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if START.unpack_from(self._mmap, mid * RECORD.size)[0] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == 0:
+            return None
+        _, end, lat, lon = RECORD.unpack_from(self._mmap, (lo - 1) * RECORD.size)
+        return (lat, lon) if key <= end else None
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+def build_database(rows: Iterable[Tuple[str, str, float, float]], path: str) -> int:
+    """Writes (start_ip, end_ip, lat, lon) rows to a sorted range database."""
+    records = sorted(
+        (int(ipaddress.IPv4Address(start)), int(ipaddress.IPv4Address(end)), float(lat), float(lon))
+        for start, end, lat, lon in rows
+    )
+    with open(path, "wb") as f:
+        for record in records:
+            f.write(RECORD.pack(*record))
+    return len(records)
+
+
+# =============================
+# BACKGROUND ENRICHMENT
+# =============================
+
+class GeoEnricher:
+    """
+    Resolves client IPs to location buckets off the request path. Requests
+    only enqueue the IP; a background task drains the queue in batches.
+    """
+
+    def __init__(self, db_path: str, cache_size: int, bucket_degrees: float, queue_size: int, batch_size: int):
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self.bucket_degrees = bucket_degrees
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._database: Optional[GeoIPDatabase] = None
+        self._recent: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.db_path:
+            try:
+                self._database = GeoIPDatabase(self.db_path)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Geo database unavailable, locations will be 'unknown': {e}")
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._queue = None
+        if self._database is not None:
+            self._database.close()
+            self._database = None
+
+    def submit(self, ip: Optional[str]):
+        """Non-blocking; drops the lookup if the queue is full or not started."""
+        if self._queue is None or not ip:
+            return
+        try:
+            self._queue.put_nowait(ip)
+        except asyncio.QueueFull:
+            geo_lookups_dropped.inc()
+
+    def resolve(self, ip: str) -> Tuple[str, str]:
+        bucket = self._recent.get(ip)
+        if bucket is not None:
+            self._recent.move_to_end(ip)
+            return bucket
+
+        location = self._database.lookup(ip) if self._database is not None else None
+        bucket = self._bucket(location) if location else UNKNOWN
+        self._recent[ip] = bucket
+        if len(self._recent) > self.cache_size:
+            self._recent.popitem(last=False)
+        return bucket
+
+    def _bucket(self, location: Tuple[float, float]) -> Tuple[str, str]:
+        size = self.bucket_degrees
+        lat, lon = location
+        return (f"{math.floor(lat / size) * size:g}", f"{math.floor(lon / size) * size:g}")
+
+    def _resolve_batch(self, ips: List[str]) -> List[Tuple[str, str]]:
+        return [self.resolve(ip) for ip in ips]
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                # mmap reads can page-fault, keep them off the event loop
+                buckets = await asyncio.to_thread(self._resolve_batch, batch)
+            except Exception as e:
+                logger.warning(f"Geo lookup batch failed: {e}")
+                continue
+            for lat, lon in buckets:
+                user_locations.labels(latitude=lat, longitude=lon).inc()
+
+
+geo_enricher = GeoEnricher(
+    db_path=settings.GEOIP_DB_PATH,
+    cache_size=settings.GEOIP_CACHE_SIZE,
+    bucket_degrees=settings.GEOIP_BUCKET_DEGREES,
+    queue_size=settings.GEOIP_QUEUE_SIZE,
+    batch_size=settings.GEOIP_BATCH_SIZE,
+)
+
+
+# Build a database from a CSV of start_ip,end_ip,latitude,longitude rows:
+#   python -m app.core.geoip ranges.csv geoip.bin
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m app.core.geoip <ranges.csv> <output.bin>")
+    with open(sys.argv[1], newline="") as f:
+        rows = (row for row in csv.reader(f) if row and row[0] != "start_ip")
+        count = build_database(rows, sys.argv[2])
+    print(f"Wrote {count} ranges to {sys.argv[2]}")
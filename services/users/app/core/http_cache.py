@@ -0,0 +1,64 @@
+import hashlib
+from typing import Any, Iterable, Optional, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.responses import orm_response
+
+# Strong validators from (id, version): every write to a row bumps its version,
+# so the tag changes exactly when the representation can have changed and is
+# computed without serializing (or even validating) the body.
+
+
+def row_etag(row) -> str:
+    return f'"{row.id}-{row.version}"'
+
+
+def rows_etag(rows: Iterable, *extra) -> str:
+    """ETag for a collection: its rows' (id, version) plus anything else in the body."""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        digest.update(f"{row.id}-{row.version},".encode("ascii"))
+    for value in extra:
+        digest.update(f"|{value}".encode("utf-8"))
+    return f'"{digest.hexdigest()}"'
+
+
+def cache_headers(etag: str, cache_control: str) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(request: Request, etag: str, cache_control: str):
+    """A 304 response if the request's If-None-Match matches etag, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=cache_headers(etag, cache_control))
+    return None
+
+
+def if_match_version(request: Request, row_id: int) -> Optional[int]:
+    """
+    Version a write is conditional on, from an If-Match row ETag; None without
+    the header or with "*". A tag that isn't this row's raises ValueError.
+    """
+    header = request.headers.get("if-match", "").strip()
+    if not header or header == "*":
+        return None
+    # Compressed responses carry the weak form of the same tag
+    tag = header.removeprefix("W/")
+    prefix = f'"{row_id}-'
+    if tag.startswith(prefix) and tag.endswith('"') and tag[len(prefix):-1].isdigit():
+        return int(tag[len(prefix):-1])
+    raise ValueError("If-Match must be an ETag of this resource")
+
+
+def conditional_orm_response(request: Request, etag: str, cache_control: str, content: Any, schema: Type[BaseModel]):
+    """304 if the client already has etag, otherwise the full orm_response with cache headers."""
+    return not_modified(request, etag, cache_control) or orm_response(
+        content, schema, headers=cache_headers(etag, cache_control)
+    )
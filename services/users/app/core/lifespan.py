@@ -4,10 +4,13 @@ from datetime import datetime, timezone
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 from app.core.config import settings  # use the cleaned-up Settings model
-from app.db.session import async_engine, Base
+from app.core.geoip import geo_enricher
+from app.core.health import health_monitor
+from app.core.http_client import service_client
+from app.core.security import password_hasher
+from app.db.session import dispose_engine, get_engine
 
 logger = logging.getLogger(__name__)
 
@@ -16,21 +19,34 @@ def format_time(dt: datetime) -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Imported here: only serving processes need the scheduler, not importers of the app
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
     scheduler = AsyncIOScheduler()
     try:
         # Store config
         app.state.settings = settings
         environment = "production" if settings.IS_PRODUCTION else "sandbox"
 
-        # Create tables
-        async with async_engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
+        # Engine and pool belong to this worker; the schema is created
+        # beforehand by `python -m app.db.migrate`, not on every boot
+        get_engine()
+
+        # Dependency health for /ready, checked now and then on an interval
+        await health_monitor.refresh()
 
         # Scheduler job example
         async def housekeeping():
             logger.info("Housekeeping tick")
 
+        # Background geo enrichment for request metrics
+        await geo_enricher.start()
+
         scheduler.add_job(housekeeping, "interval", minutes=5)
+        scheduler.add_job(
+            health_monitor.refresh, "interval", seconds=settings.HEALTH_CHECK_INTERVAL_SECONDS,
+            max_instances=1, coalesce=True
+        )
         scheduler.start()
         app.state.scheduler = scheduler
 
@@ -56,6 +72,10 @@ async def lifespan(app: FastAPI):
         # Shutdown
         if scheduler.running:
             scheduler.shutdown(wait=False)
+        await geo_enricher.stop()
+        password_hasher.shutdown()
+        await service_client.close()
+        await dispose_engine()
         logger.info(
             "\n=========================================\n"
             "          Application Shutdown           \n"
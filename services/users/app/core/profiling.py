@@ -0,0 +1,462 @@
+import asyncio
+import functools
+import hmac
+import itertools
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as Tally, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from prometheus_client import Counter, Histogram
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# =============================
+# PROMETHEUS METRICS
+# =============================
+
+request_phase_seconds = Histogram(
+    'request_phase_seconds',
+    'Time per request phase (dependencies, db_checkout, db, handler, validation, encoding, serialize, middleware, ...)',
+    ['endpoint', 'phase']
+)
+
+latency_budget_exceeded = Counter(
+    'latency_budget_exceeded',
+    'Requests slower than their route latency budget',
+    ['endpoint']
+)
+
+profiles_captured = Counter(
+    'profiles_captured',
+    'Slow requests captured by the sampling profiler',
+    ['endpoint']
+)
+
+
+# =============================
+# PHASE SPANS
+# =============================
+# Phases measured inside the endpoint (db, validation, ...) are subtracted
+# from its time, so "handler" is what the endpoint itself spent and the
+# phases of a request add up to its latency.
+
+NESTED_PHASES = ("db_checkout", "db", "bcrypt", "validation", "encoding")
+
+
+class RequestTimings:
+    __slots__ = ("start", "phases", "queries", "route_started", "route_finished",
+                 "endpoint_started", "endpoint_finished", "profile")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+        self.route_started = self.route_finished = None
+        self.endpoint_started = self.endpoint_finished = None
+        self.profile: Optional["Profile"] = None
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def breakdown(self, total: float) -> Dict[str, float]:
+        """Exclusive seconds per phase; they sum to `total`."""
+        phases = dict(self.phases)
+        if self.route_started is not None and self.route_finished is not None:
+            if self.endpoint_started is not None and self.endpoint_finished is not None:
+                endpoint = self.endpoint_finished - self.endpoint_started
+                nested = sum(phases.get(name, 0.0) for name in NESTED_PHASES)
+                phases["dependencies"] = self.endpoint_started - self.route_started
+                phases["handler"] = max(0.0, endpoint - nested)
+                phases["serialize"] = self.route_finished - self.endpoint_finished
+            else:
+                phases["handler"] = self.route_finished - self.route_started
+        phases["middleware"] = max(0.0, total - sum(phases.values()))
+        return phases
+
+
+request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def add_phase(phase: str, seconds: float):
+    timings = request_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def span(phase: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_phase(phase, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started")
+    timings = request_timings.get()
+    if timings is not None:
+        timings.add("db", elapsed)
+        timings.queries += 1
+
+
+def instrument_engine(engine):
+    """Count every query's driver time into the current request's "db" phase."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _timed_endpoint(endpoint):
+    # include_router re-creates routes from the already wrapped endpoint
+    if getattr(endpoint, "timed_endpoint", False):
+        return endpoint
+    # functools.wraps keeps the signature FastAPI reads parameters from
+    if asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            timings = request_timings.get()
+            if timings is None:
+                return await endpoint(*args, **kwargs)
+            timings.endpoint_started = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timings.endpoint_finished = time.perf_counter()
+    else:
+        # Sync endpoints run in the threadpool, which copies the request context
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            timings = request_timings.get()
+            if timings is None:
+                return endpoint(*args, **kwargs)
+            timings.endpoint_started = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                timings.endpoint_finished = time.perf_counter()
+    timed.timed_endpoint = True
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits a request into dependency resolution (including body
+    parsing), the endpoint, and response serialization, and runs the sampling
+    profiler over those when the route is due one.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timings = request_timings.get()
+            if timings is None:
+                return await handler(request)
+            sampler = slow_requests.sampler_for(request.scope["method"], self.path, timed_handler.__code__)
+            timings.route_started = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                timings.route_finished = time.perf_counter()
+                if sampler is not None:
+                    timings.profile = slow_requests.stop(sampler)
+
+        return timed_handler
+
+
+# =============================
+# SAMPLING PROFILER
+# =============================
+
+class Profile:
+    def __init__(self, route: str, interval: float):
+        self.id = None
+        self.route = route
+        self.interval = interval
+        self.stacks: Tally = Tally()
+        self.created_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.budget_ms = 0.0
+        self.phases: Dict[str, float] = {}
+        self.queries = 0
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "created_at": self.created_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "budget_ms": self.budget_ms,
+            "queries": self.queries,
+            "phases_ms": {phase: round(seconds * 1000, 2) for phase, seconds in self.phases.items()},
+            "samples": self.samples,
+        }
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frame;frame;leaf count" per line (flamegraph.pl, speedscope)."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def render(self, min_share: float = 0.02) -> str:
+        """Call tree with the share of samples per frame, hiding frames under min_share."""
+        tree: Dict = {}
+        for stack, count in self.stacks.items():
+            node = tree
+            for frame in stack:
+                entry = node.setdefault(frame, [0, {}])
+                entry[0] += count
+                node = entry[1]
+
+        total = self.samples or 1
+        phases = ", ".join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in
+                           sorted(self.phases.items(), key=lambda item: -item[1]) if seconds >= 0.0001)
+        lines = [
+            f"{self.route}: {self.duration_ms:.1f} ms (budget {self.budget_ms:.0f} ms), {self.queries} queries",
+            f"phases (ms): {phases}",
+            f"{self.samples} samples every {self.interval * 1000:g} ms",
+            "",
+        ]
+
+        def walk(node, depth):
+            for frame, (count, children) in sorted(node.items(), key=lambda item: -item[1][0]):
+                if count / total < min_share:
+                    continue
+                lines.append(f"{count / total * 100:5.1f}%  {'  ' * depth}{frame}")
+                walk(children, depth + 1)
+
+        walk(tree, 0)
+        return "\n".join(lines) + "\n"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class TaskSampler:
+    """
+    Samples one asyncio task from a helper thread. While the task runs, its
+    stack is read off the event loop thread; while it is suspended, its
+    awaiting coroutine chain is recorded with an "(await)" leaf, marked
+    "loop busy" when another task held the loop at that moment. Work handed to
+    other threads (sync endpoints, bcrypt) shows up as the await on it.
+    """
+
+    def __init__(self, profile: Profile, root):
+        self.profile = profile
+        # Stacks start at this code object (the route handler), not the server
+        self.root = root
+        self.task = asyncio.current_task()
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.profile.interval):
+            try:
+                self._sample()
+            except Exception:
+                # The task's frames change under us; a torn read just loses one sample
+                pass
+
+    def _sample(self):
+        running = asyncio.current_task(self.loop)
+        if running is self.task:
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                if frame.f_code is self.root:
+                    break
+                frame = frame.f_back
+            stack.reverse()
+        else:
+            # Task.get_stack() stops at the outer coroutine; follow what each one awaits
+            stack = []
+            awaiting = self.task.get_coro()
+            while awaiting is not None:
+                frame = getattr(awaiting, "cr_frame", None) or getattr(awaiting, "gi_frame", None)
+                if frame is None:
+                    break
+                stack.append(frame.f_code)
+                awaiting = getattr(awaiting, "cr_await", None) or getattr(awaiting, "gi_yieldfrom", None)
+            if self.root in stack:
+                stack = stack[stack.index(self.root):]
+        labels = [_frame_label(code) for code in stack]
+        if running is not self.task:
+            labels.append("(await, loop busy)" if running is not None else "(await)")
+        self.profile.stacks[tuple(labels)] += 1
+
+    def stop(self) -> Profile:
+        self._stopped.set()
+        self._thread.join()
+        return self.profile
+
+
+class SlowRequests:
+    """
+    Latency budgets per route and the profiles of requests that blew them.
+
+    A request over its budget is counted, logged with its phase breakdown (at
+    most once a second per route) and arms the profiler for that route: the
+    route's next requests are sampled until one of them is also over budget,
+    which is kept. One request is profiled at a time, and a route that just
+    yielded a profile rests for PROFILE_COOLDOWN_SECONDS.
+    """
+
+    ARMED_ATTEMPTS = 20
+
+    def __init__(self):
+        self.profiles: deque = deque(maxlen=settings.PROFILE_KEEP)
+        self._ids = itertools.count(1)
+        self._armed: Dict[str, int] = {}
+        self._cooldown: Dict[str, float] = {}
+        self._logged: Dict[str, float] = {}
+        self._budgets: Dict[Tuple[str, str], float] = {}
+        self._bound: Dict[Tuple[str, str], object] = {}
+        self._active = False
+
+    def budget(self, method: str, endpoint: str) -> float:
+        """Budget in seconds: LATENCY_BUDGETS by "METHOD /path", then "/path", else LATENCY_BUDGET_MS."""
+        key = (method, endpoint)
+        budget = self._budgets.get(key)
+        if budget is None:
+            budgets = settings.LATENCY_BUDGETS
+            ms = budgets.get(f"{method} {endpoint}", budgets.get(endpoint, settings.LATENCY_BUDGET_MS))
+            budget = self._budgets[key] = ms / 1000
+        return budget
+
+    def sampler_for(self, method: str, endpoint: str, root) -> Optional[TaskSampler]:
+        if not settings.PROFILE_ENABLED or self._active:
+            return None
+        route = f"{method} {endpoint}"
+        armed = self._armed.get(route, 0)
+        if armed:
+            self._armed[route] = armed - 1
+        elif not (settings.PROFILE_SAMPLE_RATE and random.random() < settings.PROFILE_SAMPLE_RATE):
+            return None
+        self._active = True
+        return TaskSampler(Profile(route, settings.PROFILE_INTERVAL_MS / 1000), root)
+
+    def stop(self, sampler: TaskSampler) -> Profile:
+        try:
+            return sampler.stop()
+        finally:
+            self._active = False
+
+    def _observe(self, endpoint: str, phase: str, seconds: float):
+        child = self._bound.get((endpoint, phase))
+        if child is None:
+            child = self._bound[(endpoint, phase)] = request_phase_seconds.labels(endpoint=endpoint, phase=phase)
+        child.observe(seconds)
+
+    async def finish(self, method: str, endpoint: str, total: float, timings: RequestTimings):
+        phases = timings.breakdown(total)
+        for phase, seconds in phases.items():
+            if seconds:
+                self._observe(endpoint, phase, seconds)
+
+        budget = self.budget(method, endpoint)
+        if total <= budget:
+            return
+        latency_budget_exceeded.labels(endpoint=endpoint).inc()
+        route = f"{method} {endpoint}"
+        now = time.monotonic()
+        if now - self._logged.get(route, 0.0) >= 1.0:
+            self._logged[route] = now
+            breakdown = ", ".join(f"{phase} {seconds * 1000:.1f}" for phase, seconds in
+                                  sorted(phases.items(), key=lambda item: -item[1]) if seconds >= 0.0001)
+            logger.warning(
+                f"Slow request {route}: {total * 1000:.1f} ms, budget {budget * 1000:.0f} ms, "
+                f"{timings.queries} queries; phases (ms): {breakdown}"
+            )
+
+        profile = timings.profile
+        if profile is not None:
+            self._armed.pop(route, None)
+            self._cooldown[route] = now + settings.PROFILE_COOLDOWN_SECONDS
+            profile.id = next(self._ids)
+            profile.duration_ms = total * 1000
+            profile.budget_ms = budget * 1000
+            profile.phases = phases
+            profile.queries = timings.queries
+            self.profiles.append(profile)
+            profiles_captured.labels(endpoint=endpoint).inc()
+            if settings.PROFILE_DIR:
+                await asyncio.to_thread(self._write, profile)
+        elif settings.PROFILE_ENABLED and route not in self._armed and now >= self._cooldown.get(route, 0.0):
+            self._armed[route] = self.ARMED_ATTEMPTS
+
+    def _write(self, profile: Profile):
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        name = f"{profile.created_at:%Y%m%dT%H%M%S}-{os.getpid()}-{profile.id}"
+        path = os.path.join(settings.PROFILE_DIR, name)
+        with open(f"{path}.txt", "w", encoding="utf-8") as f:
+            f.write(profile.render())
+        with open(f"{path}.folded", "w", encoding="utf-8") as f:
+            f.write(profile.folded())
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        return next((profile for profile in self.profiles if profile.id == profile_id), None)
+
+
+# Per process: each worker profiles its own requests
+slow_requests = SlowRequests()
+
+
+# =============================
+# ADMIN ENDPOINTS
+# =============================
+# Disabled (404) unless PROFILE_ADMIN_TOKEN is set; callers send it as X-Admin-Token
+
+def _require_admin(token: Optional[str]):
+    if not settings.PROFILE_ADMIN_TOKEN or not hmac.compare_digest(token or "", settings.PROFILE_ADMIN_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+admin_router = APIRouter(tags=["admin"], include_in_schema=False, route_class=TimedRoute)
+
+
+@admin_router.get("/profiles")
+async def list_profiles(x_admin_token: Optional[str] = Header(default=None)) -> List[dict]:
+    """Profiles kept by this worker, newest first."""
+    _require_admin(x_admin_token)
+    return [profile.summary() for profile in reversed(slow_requests.profiles)]
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: int, format: str = "tree", x_admin_token: Optional[str] = Header(default=None)):
+    """One profile as a call tree, or ?format=folded for flame graph tools."""
+    _require_admin(x_admin_token)
+    profile = slow_requests.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} doesn't exist")
+    return PlainTextResponse(profile.folded() if format == "folded" else profile.render())
@@ -1,4 +1,12 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 from passlib.context import CryptContext
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+from app.core.profiling import span
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -8,3 +16,74 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+# =============================
+# BOUNDED HASHING POOL
+# =============================
+
+# bcrypt takes ~100-300 ms of CPU per call and releases the GIL, so it runs on
+# a small dedicated thread pool instead of blocking the event loop. Calls past
+# workers + queue size are rejected (503) rather than queued without bound.
+
+password_hash_pending = Gauge(
+    'password_hash_pending',
+    'Password hash/verify calls running or queued on the hashing pool'
+)
+
+password_hash_queue_depth = Gauge(
+    'password_hash_queue_depth',
+    'Password hash/verify calls waiting for a free hashing worker'
+)
+
+password_hash_rejected = Counter(
+    'password_hash_rejected',
+    'Password hash/verify calls rejected because the hashing pool was saturated'
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def hash(self, password: str) -> str:
+        with span("bcrypt"):
+            return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with span("bcrypt"):
+            return await self._submit(verify_password, plain_password, hashed_password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, fn, *args):
+        if self._pending >= self.capacity:
+            password_hash_rejected.inc()
+            raise PasswordHasherBusy()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(fn, *args)
+        self._track(1)
+        # Release the slot when the work actually finishes, even if the caller
+        # was cancelled while it was still running
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._track, -1))
+        return await asyncio.wrap_future(future)
+
+    def _track(self, delta: int):
+        self._pending += delta
+        password_hash_pending.set(self._pending)
+        password_hash_queue_depth.set(max(0, self._pending - self.workers))
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
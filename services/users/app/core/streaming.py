@@ -0,0 +1,25 @@
+from typing import AsyncIterator, Sequence, Type
+import orjson
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.responses import dump_orm
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _encode_ndjson(partitions: AsyncIterator[Sequence], schema: Type[BaseModel]) -> AsyncIterator[bytes]:
+    # One chunk per partition: memory stays bounded by the partition size
+    async for rows in partitions:
+        if settings.SKIP_RESPONSE_VALIDATION:
+            yield b"".join(orjson.dumps(dump_orm(row, schema)) + b"\n" for row in rows)
+        else:
+            yield b"".join(
+                schema.model_validate(row, from_attributes=True).model_dump_json().encode("utf-8") + b"\n"
+                for row in rows
+            )
+
+
+def ndjson_response(partitions: AsyncIterator[Sequence], schema: Type[BaseModel]) -> StreamingResponse:
+    """Streams ORM rows as newline-delimited JSON, one line per row."""
+    return StreamingResponse(_encode_ndjson(partitions, schema), media_type=NDJSON_MEDIA_TYPE)
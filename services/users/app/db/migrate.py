@@ -0,0 +1,72 @@
+"""
+Schema creation, run as its own step before the service starts (an init
+container, a compose command, or by hand) instead of on every worker boot:
+
+    python -m app.db.migrate
+
+Creates missing tables, extensions and indexes (including indexes declared
+after their table already existed), and adds columns introduced after a table
+was first created (see ADDED_COLUMNS); nothing is dropped or altered otherwise.
+Concurrent runs, e.g. replicas starting together, take turns on a Postgres
+advisory lock.
+"""
+import asyncio
+import logging
+
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.schema import CreateColumn
+
+from app.db.session import Base, dispose_engine, get_engine
+import app.models.users_model  # noqa: F401  registers the tables on Base.metadata
+
+logger = logging.getLogger(__name__)
+
+# Held for the migration transaction; a second run waits, then finds nothing to do
+MIGRATE_LOCK_KEY = 0x6D696772
+
+# Columns added to existing tables after their first release. create_all only
+# creates whole tables, so these are added in place when missing
+ADDED_COLUMNS = {"users": ["version"]}
+
+
+def add_missing_columns(conn):
+    inspector = inspect(conn)
+    for table_name, column_names in ADDED_COLUMNS.items():
+        table = Base.metadata.tables[table_name]
+        existing = {column["name"] for column in inspector.get_columns(table_name)}
+        for name in column_names:
+            if name in existing:
+                continue
+            # e.g. "version INTEGER DEFAULT '1' NOT NULL": the server default fills existing rows
+            column = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column}"))
+            logger.warning(f"Added column {table_name}.{name}")
+
+
+def create_missing_indexes(conn):
+    # create_all only creates indexes together with a new table
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+async def migrate(engine=None):
+    engine = engine or get_engine()
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(select(func.pg_advisory_xact_lock(MIGRATE_LOCK_KEY)))
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(add_missing_columns)
+        await conn.run_sync(create_missing_indexes)
+
+
+async def main():
+    try:
+        await migrate()
+    finally:
+        await dispose_engine()
+    logger.warning(f"Schema up to date: {', '.join(sorted(Base.metadata.tables))}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
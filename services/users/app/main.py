@@ -1,67 +1,31 @@
+import logging
 
-import time
-from app.core.lifespan import lifespan
-from app.db.session import async_engine # Assuming this is your AsyncEngine instance
-from sqlalchemy import text #r
-from fastapi.middleware.cors import CORSMiddleware
-from decouple import config
-
-import httpx
 from fastapi import FastAPI, Request, HTTPException, status
-from fastapi.responses import JSONResponse, PlainTextResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-
-from prometheus_client import Counter, Histogram, generate_latest
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from prometheus_client import generate_latest
 
-import logging
 from app.core.config import settings
-from app.db.session import async_engine
-from .routers import router as user_router;
+from app.core.compression import CompressionMiddleware
+from app.core.health import health_monitor
+from app.core.lifespan import lifespan
+from app.core.metrics import MetricsMiddleware, error_counter, route_label
+from app.core.profiling import TimedRoute, admin_router
+from app.core.security import PasswordHasherBusy
+from .routers import router as user_router
+
 logger = logging.getLogger(__name__)
-# Create tables at startup
 
 
 # ---------------- main app ----------------
-app = FastAPI(title="Users API", lifespan=lifespan)
+# orjson for every response that isn't an explicit Response subclass
+app = FastAPI(title="Users API", lifespan=lifespan, default_response_class=ORJSONResponse)
+# Routes declared on the app itself get phase timings too
+app.router.route_class = TimedRoute
 app.include_router(router=user_router, prefix='/api/users')
+app.include_router(router=admin_router, prefix='/admin')
 
 
-# =============================
-# METRICS MIDDLEWARE
-# =============================
-
-class MetricsMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start = time.time()
-
-        response = None
-        try:
-            response = await call_next(request)
-        except Exception as exc:
-            # Track unhandled errors
-            endpoint = request.url.path
-            error_counter.labels(
-                endpoint=endpoint,
-                status_code="500"
-            ).inc()
-            raise exc
-
-        endpoint = request.url.path
-
-        # Skip internal endpoints
-        if endpoint not in ('/favicon.ico', '/metrics'):
-            endpoint_clicks.labels(endpoint=endpoint).inc()
-
-            latency = time.time() - start
-            endpoint_latency.labels(endpoint=endpoint).observe(latency)
-
-            client_ip = request.client.host
-            lat, lon = await get_location(client_ip)
-            user_locations.labels(latitude=str(lat), longitude=str(lon)).inc()
-
-        return response
-    
-
 ## Middlewares
 
 app.add_middleware(
@@ -73,53 +37,16 @@ app.add_middleware(
     
     )
 
-app.add_middleware(MetricsMiddleware),
-
-# =============================
-# PROMETHEUS METRICS
-# =============================
-
-endpoint_clicks = Counter(
-    'endpoint_clicks',
-    'Total clicks per endpoint',
-    ['endpoint']
-)
-
-endpoint_latency = Histogram(
-    'endpoint_latency_seconds',
-    'Endpoint response time',
-    ['endpoint']
-)
-
-user_locations = Counter(
-    'unique_user_locations',
-    'Unique user locations',
-    ['latitude', 'longitude']
-)
-
-error_counter = Counter(
-    'endpoint_errors',
-    'Total errors per endpoint and status code',
-    ['endpoint', 'status_code']
-)
-
-
-# =============================
-# IP LOCATION LOOKUP
-# =============================
-
-async def get_location(ip: str):
-    try:
-        async with httpx.AsyncClient() as client:
-            r = await client.get(f'http://ip-api.com/json/{ip}')
-            data = r.json()
-            if data.get("status") == "success":
-                return [data["lat"], data["lon"]]
-    except Exception:
-        pass
-    return [0.0, 0.0]
-    
+app.add_middleware(MetricsMiddleware)
 
+# Outermost, so request metrics don't include compression time
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
 
 # =============================
 # EXCEPTION HANDLERS
@@ -127,7 +54,7 @@ async def get_location(ip: str):
 
 @app.exception_handler(Exception)
 async def generic_exception_handler(request: Request, exc: Exception):
-    endpoint = request.url.path
+    endpoint = route_label(request.scope)
     error_counter.labels(endpoint=endpoint, status_code="500").inc()
 
     return JSONResponse(
@@ -136,9 +63,21 @@ async def generic_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    endpoint = route_label(request.scope)
+    error_counter.labels(endpoint=endpoint, status_code="503").inc()
+
+    return JSONResponse(
+        status_code=503,
+        content={"message": "Authentication is temporarily overloaded, please retry"},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    endpoint = request.url.path
+    endpoint = route_label(request.scope)
     error_counter.labels(endpoint=endpoint, status_code=str(exc.status_code)).inc()
 
     return JSONResponse(
@@ -162,23 +101,27 @@ def home():
     return {"message": "Welcome to FastAPI Gateway"}
 
 
-@app.get("/health")
-async def deep_health_check():
-    """Checks the application status and database connection health."""
-    try:
-        # Attempt a quick, lightweight database query
-        async with async_engine.begin() as conn:
-            # Running SELECT 1 is the standard way to check connection health
-            await conn.execute(text("SELECT 1"))
-        
-        return {"status": "OK", "database": "connected"}
-    except Exception as e:
-        logger.error(f"Database health check failed: {e}")
-        # If the DB connection fails, return a 503 Service Unavailable
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, 
-            detail="Database connection failed"
-        )
+# =============================
+# PROBES
+# =============================
+# Answered from health_monitor's cached state: probes never touch the database
+
+@app.get("/live")
+async def liveness():
+    """The process is up and serving. Dependencies aren't checked: restarting wouldn't fix an outage."""
+    return health_monitor.liveness()
+
+
+@app.get("/ready")
+async def readiness():
+    """Whether to route traffic here: dependencies healthy and the pool not saturated."""
+    ready, body = health_monitor.readiness()
+    return ORJSONResponse(body, status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+# Kept for existing scripts and dashboards; same answer as /ready
+app.add_api_route("/health", readiness, methods=["GET"])
+
 
 @app.get("/info")
 def app_info():
@@ -11,6 +11,8 @@ class User(Base):
     last_name = Column(String)
     is_active = Column(Boolean, default=True, nullable=False)
     is_superuser = Column(Boolean, default=False, nullable=False)
+    # Always 1 for now (users are never updated in place); only feeds the ETag
+    version = Column(Integer, default=1, server_default="1", nullable=False)
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, first_name={self.first_name}, last_name={self.last_name})>"
\ No newline at end of file
@@ -1,52 +1,101 @@
-from http.client import HTTPException
-from passlib.hash import bcrypt
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.http_cache import conditional_orm_response, row_etag, rows_etag
+from app.core.profiling import TimedRoute
+from app.core.streaming import ndjson_response
 from app.db.session import get_db
 from app.services.users_service import UsersService
-from app.schemas.users_schema import LoginRequest, UserCreate, UserRead
-from typing import List
-from app.core.auth import create_access_token
-
-
-
-router = APIRouter(tags=["users"])
-
-
-@router.get("/", response_model=List[UserRead])
-async def list_users(db: AsyncSession = Depends(get_db)):
-    return await UsersService.list(db)
+from app.schemas.users_schema import LoginRequest, UserBatch, UserCreate, UserRead
+from typing import List, Optional, Union
+from app.core.auth import create_access_token, get_current_claims
+from app.core.security import password_hasher
+
+
+
+router = APIRouter(tags=["users"], route_class=TimedRoute)
+
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        ids = [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    ids = list(dict.fromkeys(ids))
+    if not ids or len(ids) > settings.BATCH_IDS_MAX:
+        raise HTTPException(status_code=400, detail=f"ids must contain 1 to {settings.BATCH_IDS_MAX} ids")
+    return ids
+
+
+# ?ids=1,2,3 switches to a batch lookup: items in request order, unknown ids in "missing"
+@router.get("/", response_model=Union[UserBatch, List[UserRead]])
+async def list_users(
+    request: Request,
+    ids: Optional[str] = Query(None, description="Comma-separated user ids to fetch in one query"),
+    db: AsyncSession = Depends(get_db),
+):
+    if ids is not None:
+        user_ids = _parse_ids(ids)
+        found = await UsersService.get_many(db, user_ids)
+        items = [found[user_id] for user_id in user_ids if user_id in found]
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        return conditional_orm_response(
+            request, rows_etag(items, missing), settings.HTTP_CACHE_CONTROL, {"items": items, "missing": missing}, UserRead
+        )
+    users = await UsersService.list(db)
+    return conditional_orm_response(request, rows_etag(users), settings.HTTP_CACHE_CONTROL, users, UserRead)
+
+
+# Full user dump as NDJSON; declared before /{user_id} so it isn't captured
+@router.get("/export")
+async def export_users(db: AsyncSession = Depends(get_db)):
+    return ndjson_response(UsersService.stream(db, settings.EXPORT_CHUNK_SIZE), UserRead)
+
+
+# Profile of the bearer token's subject; declared before /{user_id}
+@router.get("/me", response_model=UserRead)
+async def get_me(request: Request, claims: dict = Depends(get_current_claims), db: AsyncSession = Depends(get_db)):
+    try:
+        user_id = int(claims.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token subject")
+    user = await UsersService.get(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return conditional_orm_response(request, row_etag(user), settings.HTTP_CACHE_CONTROL, user, UserRead)
 
 
 @router.get("/{user_id}", response_model=UserRead)
-async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    user_id =  await UsersService.get(db, user_id)
-    if user_id:
-        return user_id
-    else:
-        return {"user_id": user_id, "message": f"${user_id} doesn't exist"}
+async def get_user(user_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    user = await UsersService.get(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} doesn't exist")
+    return conditional_orm_response(request, row_etag(user), settings.HTTP_CACHE_CONTROL, user, UserRead)
 
 
 @router.delete("/{user_id}", response_model=UserRead)
 async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
-    return await UsersService.delete(db, user_id)
+    user = await UsersService.delete(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail=f"User {user_id} doesn't exist")
+    return user
 
 # Endpoints for user related operations
 @router.post("/register", response_model=UserRead)
 async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     exists = await UsersService.get_by_email(db, user.email)
     if exists:
-        return {"status" : "400", "message" : "User already Exists"}
+        raise HTTPException(status_code=400, detail="User already Exists")
     created = await UsersService.create(db, user.model_dump())
     return created
 
 @router.post("/login")
 async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     user = await UsersService.get_by_email(db, payload.email)
-    if not user or not bcrypt.verify(payload.password, user.password):
+    if not user or not await password_hasher.verify(payload.password, user.password):
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    token = create_access_token({"sub": str(user.id)}, expires_delta=60)
+    token = create_access_token(user.id, expires_delta=60)
     return {"access_token": token, "token_type": "bearer"}
 
 
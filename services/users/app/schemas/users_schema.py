@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr
+from typing import List, Optional
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -12,14 +12,16 @@ class UserCreate(UserBase):
 
 
 class UserRead(UserBase):
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     is_active: bool
-    
 
 
-class Config:
-   orm_mode = True
-   
+class UserBatch(BaseModel):
+    items: List[UserRead]
+    missing: List[int]
+
 
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -1,9 +1,40 @@
 # app/services/users_service.py
-from sqlalchemy import select
+from typing import List
+from sqlalchemy import Integer, any_, bindparam, select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession 
 from app.models.users_model import User
 
-from app.core.security import hash_password
+from app.core.security import password_hasher
+from app.core.singleflight import SingleFlight
+
+
+# Concurrent lookups of the same id or email share one query
+user_lookups = SingleFlight("users")
+
+
+def _ids_filter(db: AsyncSession, ids: List[int]):
+    # Postgres: one "id = ANY($1)" statement whatever the list length, so the
+    # prepared statement is reused; elsewhere fall back to an IN list
+    if db.get_bind().dialect.name == "postgresql":
+        return User.id == any_(bindparam("ids", ids, type_=postgresql.ARRAY(Integer)))
+    return User.id.in_(ids)
+
+
+def _snapshot(user: User) -> dict:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+async def _lookup(db: AsyncSession, key: tuple, condition):
+    # Waiters share the leader's row as a column snapshot and each get their own
+    # transient User, never an instance attached to another request's session
+    async def load():
+        result = await db.execute(select(User).filter(condition))
+        user = result.scalars().first()
+        return _snapshot(user) if user else None
+
+    data = await user_lookups.do(key, load)
+    return User(**data) if data is not None else None
 
 
 class UsersService:
@@ -16,11 +47,19 @@ class UsersService:
         result = await db.execute(select(User))
         return result.scalars().all()
     
+    # Stream all users in id order through a server-side cursor
+    # Yields lists of at most chunk_size rows
+    @staticmethod
+    async def stream(db: AsyncSession, chunk_size: int):
+        result = await db.stream_scalars(
+            select(User).order_by(User.id).execution_options(yield_per=chunk_size)
+        )
+        async for partition in result.partitions():
+            yield partition
+
     # Create a new user
     @staticmethod
     async def create(db: AsyncSession, data : dict):
-        print("PASSWORD RAW:", data["password"], type(data["password"]))
-
         password = data.get("password")
         if not password:
             raise ValueError("Password is required.")
@@ -28,7 +67,7 @@ class UsersService:
         if len(password.encode("utf-8")) > 72:
             raise ValueError("Password too long. Max 72 bytes.")
 
-        hashed_password = hash_password(password)
+        hashed_password = await password_hasher.hash(password)
         user = User(
             email=data.get('email'),
             password=hashed_password,
@@ -40,14 +79,23 @@ class UsersService:
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        user_lookups.forget(("email", user.email))
+        user_lookups.forget(("id", user.id))
         return user
     
-    # Get a user by ID
+    # Get a user by ID (coalesced with identical in-flight lookups)
+    # Returns a detached User, or None
     @staticmethod
     async def get(db: AsyncSession, user_id: int):
-        result = await db.execute(select(User).filter(User.id == user_id))
-        return result.scalars().first()
+        return await _lookup(db, ("id", user_id), User.id == user_id)
     
+    # Get many users by ID in one query
+    # Returns {id: User} for the ids that exist
+    @staticmethod
+    async def get_many(db: AsyncSession, user_ids: List[int]):
+        result = await db.execute(select(User).where(_ids_filter(db, user_ids)))
+        return {user.id: user for user in result.scalars().all()}
+
     # Delete a user by ID
     @staticmethod
     async def delete(db: AsyncSession, user_id: int):
@@ -56,14 +104,16 @@ class UsersService:
         if user:
             await db.delete(user)
             await db.commit()
+            user_lookups.forget(("id", user.id))
+            user_lookups.forget(("email", user.email))
             return user
         return None
     
-    # Get a user by email
+    # Get a user by email (coalesced with identical in-flight lookups)
+    # Returns a detached User, or None
     @staticmethod
     async def get_by_email(db: AsyncSession, email: str):
-        result = await db.execute(select(User).filter(User.email == email))
-        return result.scalars().first()
+        return await _lookup(db, ("email", email), User.email == email)
     
 
     
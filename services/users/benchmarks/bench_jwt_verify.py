@@ -0,0 +1,41 @@
+"""
+Tokens verified per second: python-jose vs PyJWT decode, and the cached
+path decode_token() takes for a token it has already verified.
+
+    cd services/users && python -m benchmarks.bench_jwt_verify [iterations]
+"""
+import sys
+import time
+
+from app.core import auth
+from app.core.auth import create_access_token, decode_token, token_cache
+
+
+def rate(fn, tokens, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(tokens[i % len(tokens)])
+    return iterations / (time.perf_counter() - start)
+
+
+def main(iterations: int):
+    tokens = [create_access_token(str(i)) for i in range(1000)]
+
+    variants = [("python-jose decode", auth._load_decoder("jose"))]
+    try:
+        variants.append(("PyJWT decode", auth._load_decoder("pyjwt")))
+    except ImportError:
+        print("PyJWT not installed, skipping")
+
+    print(f"{'path':<32}{'tokens/s':>12}")
+    for name, decoder in variants:
+        print(f"{name:<32}{rate(decoder, tokens, iterations):>12.0f}")
+
+    token_cache.clear()
+    for token in tokens:
+        decode_token(token)
+    print(f"{'decode_token (cached)':<32}{rate(decode_token, tokens, iterations):>12.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
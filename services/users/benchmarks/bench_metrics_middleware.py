@@ -0,0 +1,76 @@
+"""
+Per-request overhead of the metrics middleware, driven directly over ASGI
+(no sockets, no HTTP client) so the middleware cost isn't lost in noise.
+
+    cd services/users && python -m benchmarks.bench_metrics_middleware [requests]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.metrics import MetricsMiddleware
+
+
+class PassThroughHTTPMiddleware(BaseHTTPMiddleware):
+    # Reference point: the cost of BaseHTTPMiddleware alone, doing nothing
+    async def dispatch(self, request, call_next):
+        return await call_next(request)
+
+
+def build_app(middleware=None) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/users/{user_id}")
+    async def get_user(user_id: int):
+        return {"id": user_id}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+async def drive(app, requests: int) -> float:
+    """Returns mean nanoseconds per request."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i):
+        path = f"/api/users/{i}"
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "", "headers": [],
+            "client": ("127.0.0.1", 50000), "server": ("bench", 80),
+        }
+
+    for i in range(200):  # warm up route matching, label children, etc.
+        await app(scope(i), receive, send)
+
+    start = time.perf_counter_ns()
+    for i in range(requests):
+        await app(scope(i), receive, send)
+    return (time.perf_counter_ns() - start) / requests
+
+
+async def main(requests: int):
+    variants = [
+        ("no middleware", build_app()),
+        ("BaseHTTPMiddleware (pass-through)", build_app(PassThroughHTTPMiddleware)),
+        ("MetricsMiddleware (ASGI)", build_app(MetricsMiddleware)),
+    ]
+    baseline = None
+    print(f"{'variant':<36}{'ns/request':>12}{'overhead':>12}")
+    for name, app in variants:
+        ns = await drive(app, requests)
+        baseline = ns if baseline is None else baseline
+        print(f"{name:<36}{ns:>12.0f}{ns - baseline:>12.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
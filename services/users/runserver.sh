@@ -1 +1,3 @@
-uvicorn app.main:app --reload --env-file .env.local
\ No newline at end of file
+# Same environment for the schema step and the server
+set -a; [ -f .env.local ] && . ./.env.local; set +a
+python -m app.db.migrate && uvicorn app.main:app --reload --env-file .env.local
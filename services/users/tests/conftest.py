@@ -1,7 +1,10 @@
 import pytest
+import pytest_asyncio
 import asyncio
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from app.db.session import Base, get_db
 from app.main import app
 
@@ -31,4 +34,31 @@ def override_get_db(db_session):
             db_session.close()
     app.dependency_overrides[get_db] = _override_get_db
     yield
-    app.dependency_overrides.clear()
\ No newline at end of file
+    app.dependency_overrides.clear()
+
+# Async fixtures: the services use AsyncSession, so these run them against
+# in-memory SQLite through aiosqlite without needing Postgres
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+@pytest_asyncio.fixture(scope="function")
+async def async_db_session():
+    """Create a fresh async database for each test"""
+    async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(bind=async_engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with session_factory() as session:
+            yield session
+    finally:
+        await async_engine.dispose()
+
+@pytest_asyncio.fixture(scope="function")
+async def async_client(async_db_session):
+    """HTTP client against the app with get_db overridden"""
+    async def _override_get_db():
+        yield async_db_session
+    app.dependency_overrides[get_db] = _override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+    app.dependency_overrides.clear()
@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from app.core.geoip import GeoEnricher, GeoIPDatabase, UNKNOWN, build_database, user_locations
+
+
+@pytest.fixture
+def geo_db_path(tmp_path):
+    path = str(tmp_path / "geoip.bin")
+    build_database([
+        ("81.2.69.0", "81.2.69.255", 51.5, -0.1),
+        ("1.0.0.0", "1.0.0.255", -33.9, 151.2),
+        ("8.8.8.0", "8.8.8.255", 37.4, -122.1),
+    ], path)
+    return path
+
+
+def test_lookup_binary_search(geo_db_path):
+    db = GeoIPDatabase(geo_db_path)
+    try:
+        assert db.lookup("8.8.8.8") == pytest.approx((37.4, -122.1), abs=1e-4)
+        assert db.lookup("1.0.0.1") == pytest.approx((-33.9, 151.2), abs=1e-4)
+        assert db.lookup("8.8.9.1") is None
+        assert db.lookup("0.0.0.1") is None
+        assert db.lookup("::1") is None
+    finally:
+        db.close()
+
+
+@pytest.mark.asyncio
+async def test_enricher_buckets_in_background(geo_db_path):
+    enricher = GeoEnricher(geo_db_path, cache_size=2, bucket_degrees=10, queue_size=10, batch_size=4)
+    await enricher.start()
+    try:
+        before = user_locations.labels(latitude="30", longitude="-130")._value.get()
+        enricher.submit("8.8.8.8")
+        enricher.submit("8.8.8.4")
+        for _ in range(100):
+            if user_locations.labels(latitude="30", longitude="-130")._value.get() - before == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert user_locations.labels(latitude="30", longitude="-130")._value.get() - before == 2
+        assert enricher.resolve("127.0.0.1") == UNKNOWN
+        assert len(enricher._recent) == 2
+    finally:
+        await enricher.stop()
+    enricher.submit("8.8.8.8")  # no-op once stopped
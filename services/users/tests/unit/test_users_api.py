@@ -0,0 +1,135 @@
+import asyncio
+import json
+import threading
+import pytest
+from app.core import auth
+from app.core.auth import create_access_token, is_token_expired, refresh_access_token, token_cache, verify_token
+from app.core.security import PasswordHasher, PasswordHasherBusy, password_hash_pending, password_hash_queue_depth
+from app.core.singleflight import singleflight_calls
+from app.services.users_service import UsersService, user_lookups
+
+
+async def _seed(db, count=3):
+    for i in range(count):
+        await UsersService.create(db, {
+            "email": f"user{i}@example.com",
+            "password": "TestPass123!",
+            "first_name": "Test",
+            "last_name": f"User{i}",
+        })
+
+
+@pytest.mark.asyncio
+async def test_export_users_ndjson(async_client, async_db_session):
+    await _seed(async_db_session)
+    response = await async_client.get("/api/users/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [u["email"] for u in lines] == ["user0@example.com", "user1@example.com", "user2@example.com"]
+    assert all("password" not in u for u in lines)
+
+
+@pytest.mark.asyncio
+async def test_login_verifies_off_event_loop(async_client, async_db_session):
+    await _seed(async_db_session, count=1)
+    response = await async_client.post("/api/users/login", json={"email": "user0@example.com", "password": "TestPass123!"})
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+
+    response = await async_client.post("/api/users/login", json={"email": "user0@example.com", "password": "wrong"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    release = threading.Event()
+    try:
+        running = [asyncio.ensure_future(hasher._submit(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher._submit(release.wait)
+        assert password_hash_queue_depth._value.get() == 1
+        release.set()
+        await asyncio.gather(*running)
+        await asyncio.sleep(0)
+        assert password_hash_pending._value.get() == 0
+    finally:
+        release.set()
+        hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batch_get_users_by_ids(async_client, async_db_session):
+    await _seed(async_db_session, count=2)
+    response = await async_client.get("/api/users/", params={"ids": "2,7,1"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [u["id"] for u in body["items"]] == [2, 1]
+    assert body["missing"] == [7]
+
+
+@pytest.mark.asyncio
+async def test_me_decodes_bearer_token_once(async_client, async_db_session, monkeypatch):
+    await _seed(async_db_session, count=1)
+    response = await async_client.post("/api/users/login", json={"email": "user0@example.com", "password": "TestPass123!"})
+    token = response.json()["access_token"]
+
+    token_cache.clear()
+    calls = []
+    real_decode = auth._decode
+    monkeypatch.setattr(auth, "_decode", lambda t: calls.append(t) or real_decode(t))
+    for _ in range(3):
+        response = await async_client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+        assert response.status_code == 200
+        assert response.json()["email"] == "user0@example.com"
+    assert len(calls) == 1
+
+    response = await async_client.get("/api/users/me")
+    assert response.status_code == 401
+
+
+def test_expired_token_is_rejected():
+    token = create_access_token("1", expires_delta=-1)
+    assert verify_token(token) is None
+    assert is_token_expired(token)
+    assert refresh_access_token(token) is None
+
+    token = create_access_token("1")
+    assert verify_token(token) == "1"
+    assert not is_token_expired(token)
+
+
+@pytest.mark.asyncio
+async def test_user_reads_are_conditional(async_client, async_db_session):
+    await _seed(async_db_session, count=2)
+    response = await async_client.get("/api/users/1")
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+    assert (await async_client.get("/api/users/1", headers={"If-None-Match": etag})).status_code == 304
+
+    listing = await async_client.get("/api/users/")
+    assert (await async_client.get("/api/users/", headers={"If-None-Match": listing.headers["etag"]})).status_code == 304
+    await _seed_one(async_db_session)
+    assert (await async_client.get("/api/users/", headers={"If-None-Match": listing.headers["etag"]})).status_code == 200
+
+
+async def _seed_one(db):
+    await UsersService.create(db, {"email": "late@example.com", "password": "TestPass123!",
+                                   "first_name": "Late", "last_name": "User"})
+
+
+@pytest.mark.asyncio
+async def test_concurrent_user_lookups_share_one_query(async_db_session):
+    await _seed(async_db_session, count=1)
+    coalesced = singleflight_calls.labels(group="users", result="coalesced")
+    before = coalesced._value.get()
+
+    users = await asyncio.gather(*(UsersService.get_by_email(async_db_session, "user0@example.com") for _ in range(5)))
+    assert coalesced._value.get() == before + 4
+    assert {user.email for user in users} == {"user0@example.com"}
+    # Every caller gets its own instance, none bound to the leader's session
+    assert len({id(user) for user in users}) == 5
+    assert await UsersService.get(async_db_session, users[0].id) is not None
+    assert len(user_lookups) == 0